@@ -0,0 +1,477 @@
+import numpy as np
+import argparse
+import time
+
+import GameItself as engine
+
+TYPE_NONE = 0
+TYPE_TANK = 1
+TYPE_AIR_BALLOON = 2
+TYPE_AIRSHIP = 3
+
+WEAPON_ARTILLERY = 0
+WEAPON_SHOTGUN = 1
+
+MAX_PARTS = 4
+MUZZLE_LENGTH = 40
+GUN_HEIGHT = 15
+MIN_FIRE_POWER = 10
+MAX_FIRE_POWER = 50
+
+
+def vehicle_table():
+    """
+    Request for the hitboxes, hit points and experience points of vehicle types (from the class constants of
+    GameItself)
+    :return: numpy array[4 x MAX_PARTS x 4] - hitbox parts of every type (zero parts are padding)
+    :return: numpy array[4 x MAX_PARTS] - is the part used
+    :return: numpy array[4 x 4] - bounding box of the hitbox of every type
+    :return: numpy array[4] - hit points of every type
+    :return: numpy array[4] - experience points of every type
+    """
+    parts = np.zeros((4, MAX_PARTS, 4))
+    valid = np.zeros((4, MAX_PARTS), dtype=bool)
+    bounds = np.zeros((4, 4))
+    hit_points = np.zeros(4, dtype=int)
+    exp_points = np.zeros(4, dtype=int)
+    for vehicle_type, vehicle_class in ((TYPE_TANK, engine.Tank), (TYPE_AIR_BALLOON, engine.AirBalloon),
+                                        (TYPE_AIRSHIP, engine.Airship)):
+        offsets = vehicle_class.HITBOX_OFFSETS
+        parts[vehicle_type, :len(offsets)] = offsets
+        valid[vehicle_type, :len(offsets)] = True
+        bounds[vehicle_type] = vehicle_class.HITBOX_BOUNDS
+        hit_points[vehicle_type] = vehicle_class.HIT_POINTS
+        exp_points[vehicle_type] = vehicle_class.EXP_POINTS
+    return parts, valid, bounds, hit_points, exp_points
+
+
+PARTS, PART_VALID, BOUNDS, HIT_POINTS, EXP_POINTS = vehicle_table()
+
+
+def projectile_table():
+    """
+    Request for the radius, damage and kind of projectile classes of GameItself
+    :return: dict - {class: (radius, damage, kind)}
+    """
+    table = {}
+    for projectile_class in (engine.Shell, engine.Shrapnel, engine.Bomb):
+        projectile = projectile_class(None, [0, 0], [0, 0])
+        table[projectile_class] = (projectile.rad, projectile.damage, projectile.kind)
+    return table
+
+
+PROJECTILES = projectile_table()
+SPAWN_TABLE = engine.SpawnTable()
+AIRSHIP_CHANCE = SPAWN_TABLE.weights["Airship"] / sum(SPAWN_TABLE.weights.values())
+
+
+class BatchEnvironment:
+    """
+    N independent worlds of the game in stacked NumPy arrays, that are simulated all at once. Every world has two
+    tanks, at most max_targets targets and at most max_projectiles projectiles. Rules follow Gameplay without
+    drawing: both tanks act every tick and experience of a killed vehicle goes to the tank that fired the last
+    hit (bombs and destroying of own tank give nothing)
+
+    Vehicles are stored in columns: 0 and 1 - tanks, 2 and further - targets
+    """
+
+    def __init__(self, worlds, max_targets=4, max_projectiles=64, size=None, seed=None, auto_reset=True):
+        """
+        Initializing a BatchEnvironment
+        :param worlds: int - number of worlds
+        :param max_targets: int - maximum number of targets in every world
+        :param max_projectiles: int - maximum number of projectiles in every world (new ones are dropped if full)
+        :param size: list[int, int] - [width of screen, height of screen], current screen size if not given
+        :param seed: int - seed of random numbers (random seed if not given)
+        :param auto_reset: bool - are finished worlds started again at the end of step
+        """
+        self.worlds = worlds
+        self.max_targets = max_targets
+        self.max_projectiles = max_projectiles
+        if size is None:
+            size = (engine.SCREEN_WIDTH, engine.SCREEN_HEIGHT)
+        self.width, self.height = size
+        self.rng = np.random.default_rng(seed)
+        self.auto_reset = auto_reset
+
+        vehicles = 2 + max_targets
+        self.vehicle_types = np.zeros((worlds, vehicles), dtype=np.int8)
+        self.vehicle_x = np.zeros((worlds, vehicles))
+        self.vehicle_y = np.zeros((worlds, vehicles))
+        self.vehicle_velocity = np.zeros((worlds, vehicles))
+        self.hit_points = np.zeros((worlds, vehicles))
+
+        shape = (worlds, max_projectiles)
+        self.projectile_x = np.zeros(shape)
+        self.projectile_y = np.zeros(shape)
+        self.previous_x = np.zeros(shape)
+        self.previous_y = np.zeros(shape)
+        self.velocity_x = np.zeros(shape)
+        self.velocity_y = np.zeros(shape)
+        self.rads = np.zeros(shape)
+        self.damages = np.zeros(shape)
+        self.owners = np.zeros(shape, dtype=np.int8)
+        self.alive = np.zeros(shape, dtype=bool)
+
+        self.cooldowns = np.zeros((worlds, 2), dtype=np.int32)
+        self.score = np.zeros((worlds, 2), dtype=np.int64)
+        self.ticks = np.zeros(worlds, dtype=np.int64)
+        self.observation_size = 4 + 5 * max_targets
+        self.reset()
+
+    def reset(self, worlds=None):
+        """
+        Starting worlds anew
+        :param worlds: numpy array[bool] or numpy array[int] - reset worlds (every world if not given)
+        :return: numpy array[worlds x observation_size] - observations of every world
+        """
+        if worlds is None:
+            worlds = slice(None)
+        self.vehicle_types[worlds] = TYPE_NONE
+        self.vehicle_types[worlds, :2] = TYPE_TANK
+        self.vehicle_x[worlds, 0] = 300
+        self.vehicle_x[worlds, 1] = 1200
+        self.vehicle_y[worlds, :2] = self.height - (engine.GROUND_HEIGHT / 2 + engine.Tank.SIZE[1] / 2)
+        self.vehicle_velocity[worlds] = 0
+        self.hit_points[worlds, :2] = HIT_POINTS[TYPE_TANK]
+        self.alive[worlds] = False
+        self.cooldowns[worlds] = 0
+        self.score[worlds] = 0
+        self.ticks[worlds] = 0
+        return self.observe()
+
+    def observe(self):
+        """
+        Request for the observations: [x of tank, hit points of tank] for both tanks (hit points are -1 for dead
+        tank), then [type, x, y, x velocity, hit points] for every target slot (zeros for empty slot)
+        :return: numpy array[worlds x observation_size] - observations of every world
+        """
+        observations = np.zeros((self.worlds, self.observation_size), dtype=np.float32)
+        tanks_alive = self.vehicle_types[:, :2] != TYPE_NONE
+        observations[:, 0:4:2] = self.vehicle_x[:, :2]
+        observations[:, 1:4:2] = np.where(tanks_alive, self.hit_points[:, :2], -1)
+        targets = np.stack((self.vehicle_types[:, 2:], self.vehicle_x[:, 2:], self.vehicle_y[:, 2:],
+                            self.vehicle_velocity[:, 2:], self.hit_points[:, 2:]), axis=2)
+        targets[self.vehicle_types[:, 2:] == TYPE_NONE] = 0
+        observations[:, 4:] = targets.reshape(self.worlds, -1)
+        return observations
+
+    def step(self, move=None, angle=None, power=None, fire=None, weapon=None):
+        """
+        Simulating one tick in every world
+        :param move: numpy array[worlds x 2] - direction of tank movement (-1 - left, 0 - stop, 1 - right)
+        :param angle: numpy array[worlds x 2] - angle of gun in radians (from -pi to 0, up is -pi / 2)
+        :param power: numpy array[worlds x 2] - fire power (from 10 to 50), it takes as many ticks to charge the gun
+                      again as it takes to charge the fire power in Gameplay
+        :param fire: numpy array[worlds x 2] - is gun fired (if it is charged)
+        :param weapon: numpy array[worlds x 2] - WEAPON_ARTILLERY or WEAPON_SHOTGUN
+        :return: numpy array[worlds x observation_size] - observations after the tick
+        :return: numpy array[worlds x 2] - experience points earned by tanks during the tick
+        :return: numpy array[worlds] - has the world finished (both tanks are dead)
+        """
+        score = self.score.copy()
+        self.control(move, angle, power, fire, weapon)
+        self.create_new_targets()
+        self.move_objects()
+        self.drop_bombs()
+        killers = self.check_hit()
+        self.remove_vehicles(killers)
+        self.ticks += 1
+        rewards = self.score - score
+        finished = (self.vehicle_types[:, 0] == TYPE_NONE) & (self.vehicle_types[:, 1] == TYPE_NONE)
+        if self.auto_reset and finished.any():
+            self.reset(finished)
+        return self.observe(), rewards, finished
+
+    def control(self, move, angle, power, fire, weapon):
+        """
+        Applying actions of tanks
+        :param move: numpy array[worlds x 2] - direction of tank movement
+        :param angle: numpy array[worlds x 2] - angle of gun in radians
+        :param power: numpy array[worlds x 2] - fire power
+        :param fire: numpy array[worlds x 2] - is gun fired
+        :param weapon: numpy array[worlds x 2] - type of gun
+        """
+        tanks_alive = self.vehicle_types[:, :2] != TYPE_NONE
+        if move is not None:
+            self.vehicle_velocity[:, :2] = np.where(tanks_alive, np.sign(move) * engine.Tank.SPEED, 0)
+        self.cooldowns = np.maximum(self.cooldowns - 1, 0)
+        if fire is None:
+            return
+        firing = np.asarray(fire, dtype=bool) & tanks_alive & (self.cooldowns == 0)
+        if not firing.any():
+            return
+        worlds, tanks = np.nonzero(firing)
+        angles = np.zeros((self.worlds, 2)) - np.pi / 2 if angle is None else np.clip(angle, -np.pi, 0)
+        buckets = np.round(angles[worlds, tanks] / engine.ANGLE_STEP).astype(np.int64) % engine.ANGLE_BUCKETS
+        speeds = np.full(len(worlds), float(MAX_FIRE_POWER)) if power is None else \
+            np.clip(np.asarray(power, dtype=float)[worlds, tanks], MIN_FIRE_POWER, MAX_FIRE_POWER)
+        self.cooldowns[worlds, tanks] = speeds.astype(np.int32) - MIN_FIRE_POWER + 1
+        shotgun = np.zeros(len(worlds), dtype=bool) if weapon is None else \
+            np.asarray(weapon)[worlds, tanks] == WEAPON_SHOTGUN
+
+        sin = np.sin(buckets * engine.ANGLE_STEP)
+        cos = np.cos(buckets * engine.ANGLE_STEP)
+        start_x = self.vehicle_x[worlds, tanks] + MUZZLE_LENGTH * cos
+        start_y = self.vehicle_y[worlds, tanks] - GUN_HEIGHT + MUZZLE_LENGTH * sin
+        artillery = ~shotgun
+        new_worlds = [worlds[artillery]]
+        new_x = [start_x[artillery]]
+        new_y = [start_y[artillery]]
+        new_angles = [buckets[artillery]]
+        new_speeds = [speeds[artillery]]
+        new_owners = [tanks[artillery]]
+        new_classes = [np.zeros(int(artillery.sum()), dtype=np.int8)]
+        for spread in engine.Shotgun.SPREAD_BUCKETS:
+            new_worlds.append(worlds[shotgun])
+            new_x.append(start_x[shotgun])
+            new_y.append(start_y[shotgun])
+            new_angles.append((buckets[shotgun] + spread) % engine.ANGLE_BUCKETS)
+            new_speeds.append(speeds[shotgun])
+            new_owners.append(tanks[shotgun])
+            new_classes.append(np.ones(int(shotgun.sum()), dtype=np.int8))
+        new_angles = np.concatenate(new_angles) * engine.ANGLE_STEP
+        new_speeds = np.concatenate(new_speeds)
+        classes = np.concatenate(new_classes)
+        rads = np.where(classes == 0, PROJECTILES[engine.Shell][0], PROJECTILES[engine.Shrapnel][0])
+        damages = np.where(classes == 0, PROJECTILES[engine.Shell][1], PROJECTILES[engine.Shrapnel][1])
+        self.add_projectiles(np.concatenate(new_worlds), np.concatenate(new_x), np.concatenate(new_y),
+                             new_speeds * np.cos(new_angles), new_speeds * np.sin(new_angles), rads, damages,
+                             np.concatenate(new_owners))
+
+    def add_projectiles(self, worlds, x, y, velocity_x, velocity_y, rads, damages, owners):
+        """
+        Placing new projectiles into free slots of their worlds (projectiles that do not fit are dropped)
+        :param worlds: numpy array[int] - world of every new Projectile
+        :param x: numpy array[float] - x coordinates
+        :param y: numpy array[float] - y coordinates
+        :param velocity_x: numpy array[float] - x velocities
+        :param velocity_y: numpy array[float] - y velocities
+        :param rads: numpy array[float] - radiuses
+        :param damages: numpy array[float] - damages
+        :param owners: numpy array[int] - index of tank that fired (-1 - dropped by Airship)
+        """
+        if len(worlds) == 0:
+            return
+        order = np.argsort(worlds, kind="stable")
+        worlds = worlds[order]
+        group_starts = np.flatnonzero(np.concatenate(([True], worlds[1:] != worlds[:-1])))
+        group_sizes = np.diff(np.append(group_starts, len(worlds)))
+        ranks = np.arange(len(worlds)) - np.repeat(group_starts, group_sizes)
+        free_slots = np.argsort(self.alive[worlds], axis=1, kind="stable")
+        free_counts = self.max_projectiles - self.alive[worlds].sum(axis=1)
+        fits = ranks < free_counts
+        rows = order[fits]
+        worlds = worlds[fits]
+        slots = free_slots[np.flatnonzero(fits), ranks[fits]]
+        self.projectile_x[worlds, slots] = x[rows]
+        self.projectile_y[worlds, slots] = y[rows]
+        self.previous_x[worlds, slots] = x[rows]
+        self.previous_y[worlds, slots] = y[rows]
+        self.velocity_x[worlds, slots] = velocity_x[rows]
+        self.velocity_y[worlds, slots] = velocity_y[rows]
+        self.rads[worlds, slots] = rads[rows]
+        self.damages[worlds, slots] = damages[rows]
+        self.owners[worlds, slots] = owners[rows]
+        self.alive[worlds, slots] = True
+
+    def create_new_targets(self):
+        """
+        Creating one new target (AirBalloon or Airship) in worlds with free target slots with small chance
+        (with the rate and the share of airships of the default SpawnTable of GameItself)
+        """
+        targets = self.vehicle_types[:, 2:]
+        free = targets == TYPE_NONE
+        worlds = np.flatnonzero(free.any(axis=1) &
+                                (self.rng.random(self.worlds) < SPAWN_TABLE.rate / engine.TICK_RATE))
+        if len(worlds) == 0:
+            return
+        slots = 2 + free[worlds].argmax(axis=1)
+        airship = self.rng.random(len(worlds)) < AIRSHIP_CHANCE
+        direction = self.rng.integers(0, 2, len(worlds))
+        balloon_width, balloon_height = engine.AirBalloon.SIZE
+        airship_width, airship_height = engine.Airship.SIZE
+        balloon_x = self.rng.integers(balloon_width, self.width - balloon_width, len(worlds), endpoint=True)
+        balloon_y = self.rng.integers(balloon_height, self.height - engine.GROUND_HEIGHT - balloon_height, len(worlds),
+                                      endpoint=True)
+        airship_x = np.where(direction == 0, -airship_width, self.width + airship_width)
+        airship_y = self.rng.integers(airship_height, self.height - engine.GROUND_HEIGHT - airship_height, len(worlds),
+                                      endpoint=True)
+        speed = self.rng.integers(engine.Airship.SPEEDS[0], engine.Airship.SPEEDS[1], len(worlds), endpoint=True)
+        self.vehicle_types[worlds, slots] = np.where(airship, TYPE_AIRSHIP, TYPE_AIR_BALLOON)
+        self.vehicle_x[worlds, slots] = np.where(airship, airship_x, balloon_x)
+        self.vehicle_y[worlds, slots] = np.where(airship, airship_y, balloon_y)
+        self.vehicle_velocity[worlds, slots] = np.where(airship, np.where(direction == 0, speed, -speed), 0)
+        self.hit_points[worlds, slots] = np.where(airship, HIT_POINTS[TYPE_AIRSHIP], HIT_POINTS[TYPE_AIR_BALLOON])
+
+    def move_objects(self):
+        """
+        Moving every vehicle and projectile within a time unit
+        """
+        self.vehicle_x += self.vehicle_velocity
+        self.previous_x[:] = self.projectile_x
+        self.previous_y[:] = self.projectile_y
+        self.velocity_y += engine.GRAVITATION
+        self.projectile_x += self.velocity_x
+        self.projectile_y += self.velocity_y
+
+    def drop_bombs(self):
+        """
+        Dropping bombs from airships with small chance (Airship.BOMB_RATE bombs per second for every Airship)
+        """
+        worlds, slots = np.nonzero((self.vehicle_types == TYPE_AIRSHIP) &
+                                   (self.rng.random(self.vehicle_types.shape) < engine.Airship.BOMB_RATE /
+                                    engine.TICK_RATE))
+        if len(worlds) == 0:
+            return
+        rad, damage, _ = PROJECTILES[engine.Bomb]
+        zeros = np.zeros(len(worlds))
+        offset_x, offset_y = engine.Airship.BOMB_OFFSET
+        self.add_projectiles(worlds, self.vehicle_x[worlds, slots] + offset_x, self.vehicle_y[worlds, slots] + offset_y,
+                             zeros, zeros, zeros + rad, zeros + damage, np.full(len(worlds), -1))
+
+    def check_hit(self):
+        """
+        Checking which projectiles hit vehicles (swept from the previous to the current position, only the earliest
+        hit counts), the ground or left the screen, and removing them
+        :return: numpy array[worlds x vehicles] - index of tank that fired the last hit into the vehicle (-1 - none)
+        """
+        killers = np.full(self.vehicle_types.shape, -1, dtype=np.int8)
+        worlds, slots = np.nonzero(self.alive)
+        if len(worlds):
+            x0 = self.previous_x[worlds, slots]
+            y0 = self.previous_y[worlds, slots]
+            x1 = self.projectile_x[worlds, slots]
+            y1 = self.projectile_y[worlds, slots]
+            rads = self.rads[worlds, slots]
+            types = self.vehicle_types[worlds]
+            vehicle_x = self.vehicle_x[worlds]
+            vehicle_y = self.vehicle_y[worlds]
+            bounds = BOUNDS[types]
+            near = ((types != TYPE_NONE) &
+                    ((np.maximum(x0, x1) + rads)[:, None] > vehicle_x + bounds[..., 0]) &
+                    ((np.minimum(x0, x1) - rads)[:, None] < vehicle_x + bounds[..., 2]) &
+                    ((np.maximum(y0, y1) + rads)[:, None] > vehicle_y + bounds[..., 1]) &
+                    ((np.minimum(y0, y1) - rads)[:, None] < vehicle_y + bounds[..., 3]))
+            rows, vehicles = np.nonzero(near)
+            if len(rows):
+                self.hit_vehicles(worlds[rows], slots[rows], vehicles, killers)
+
+        x = self.projectile_x
+        y = self.projectile_y
+        rads = self.rads
+        out = (x < -rads) | (x > self.width + rads) | (y - rads > self.height - engine.GROUND_HEIGHT / 2)
+        above = self.alive & (y < -rads)
+        if above.any():
+            velocity_x = self.velocity_x[above]
+            velocity_y = self.velocity_y[above]
+            return_time = (-velocity_y + np.sqrt(velocity_y ** 2 + 2 * engine.GRAVITATION *
+                                                 (-rads[above] - y[above]))) / engine.GRAVITATION
+            return_x = x[above] + velocity_x * return_time
+            out[above] |= ((return_x < -rads[above] - np.abs(velocity_x)) |
+                           (return_x > self.width + rads[above] + np.abs(velocity_x)))
+        self.alive &= ~out
+        return killers
+
+    def hit_vehicles(self, worlds, slots, vehicles, killers):
+        """
+        Checking pairs of projectiles and vehicles with overlapping bounding boxes by their hitbox parts, and applying
+        the earliest hit of every Projectile
+        :param worlds: numpy array[int] - world of every pair
+        :param slots: numpy array[int] - slot of Projectile of every pair
+        :param vehicles: numpy array[int] - column of Vehicle of every pair
+        :param killers: numpy array[worlds x vehicles] - index of tank that fired the last hit into the vehicle
+        """
+        x0 = self.previous_x[worlds, slots]
+        y0 = self.previous_y[worlds, slots]
+        rads = self.rads[worlds, slots][:, None]
+        types = self.vehicle_types[worlds, vehicles]
+        parts = PARTS[types]
+        enter = 0
+        leave = 1
+        for start, displacement, center, half_size in (
+                (x0, self.projectile_x[worlds, slots] - x0, self.vehicle_x[worlds, vehicles][:, None] + parts[..., 0],
+                 parts[..., 2]),
+                (y0, self.projectile_y[worlds, slots] - y0, self.vehicle_y[worlds, vehicles][:, None] + parts[..., 1],
+                 parts[..., 3])):
+            displacement = np.where(displacement == 0, 1e-12, displacement)[:, None]
+            offset = center - start[:, None]
+            reach = half_size + rads
+            low_time = (offset - reach) / displacement
+            high_time = (offset + reach) / displacement
+            enter = np.maximum(enter, np.minimum(low_time, high_time))
+            leave = np.minimum(leave, np.maximum(low_time, high_time))
+        times = np.where((enter < leave) & PART_VALID[types], enter, np.inf).min(axis=1)
+        hit = np.isfinite(times)
+        if not hit.any():
+            return
+        worlds, slots, vehicles, times = worlds[hit], slots[hit], vehicles[hit], times[hit]
+        order = np.lexsort((vehicles, times, slots, worlds))
+        first = np.concatenate(([True], (worlds[order][1:] != worlds[order][:-1]) |
+                                (slots[order][1:] != slots[order][:-1])))
+        earliest = order[first]
+        earliest = earliest[np.argsort(times[earliest], kind="stable")]
+        worlds, slots, vehicles = worlds[earliest], slots[earliest], vehicles[earliest]
+        np.subtract.at(self.hit_points, (worlds, vehicles), self.damages[worlds, slots])
+        killers[worlds, vehicles] = self.owners[worlds, slots]
+        self.alive[worlds, slots] = False
+
+    def remove_vehicles(self, killers):
+        """
+        Removing dead vehicles (experience goes to the tank that fired the last hit) and targets, that have left
+        the world
+        :param killers: numpy array[worlds x vehicles] - index of tank that fired the last hit into the vehicle
+        """
+        dead = (self.vehicle_types != TYPE_NONE) & (self.hit_points < 0)
+        if dead.any():
+            worlds, vehicles = np.nonzero(dead)
+            tanks = killers[worlds, vehicles]
+            credited = (tanks >= 0) & (tanks != vehicles)
+            np.add.at(self.score, (worlds[credited], tanks[credited]),
+                      EXP_POINTS[self.vehicle_types[worlds[credited], vehicles[credited]]])
+            self.vehicle_types[dead] = TYPE_NONE
+        types = self.vehicle_types[:, 2:]
+        bounds = BOUNDS[types]
+        x = self.vehicle_x[:, 2:]
+        y = self.vehicle_y[:, 2:]
+        margin = engine.WORLD_MARGIN
+        out = ((x + bounds[..., 2] < -margin) | (x + bounds[..., 0] > self.width + margin) |
+               (y + bounds[..., 3] < -margin) | (y + bounds[..., 1] > self.height + margin))
+        types[out & (types != TYPE_NONE)] = TYPE_NONE
+
+
+def main(args=None):
+    """
+    Measuring the throughput of BatchEnvironment with random actions
+    :param args: list[string] - command line arguments, sys.argv if not given
+    """
+    parser = argparse.ArgumentParser(description="Batched worlds of SimpleArtGame with random actions")
+    parser.add_argument("--worlds", type=int, default=1024, help="number of worlds")
+    parser.add_argument("--ticks", type=int, default=1000, help="number of ticks")
+    parser.add_argument("--seed", type=int, default=0, help="seed of random numbers")
+    parser.add_argument("--size", type=int, nargs=2, default=[1920, 1080], metavar=("WIDTH", "HEIGHT"),
+                        help="screen size")
+    args = parser.parse_args(args)
+
+    environment = BatchEnvironment(args.worlds, size=args.size, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    shape = (args.worlds, 2)
+    rewards = np.zeros(shape, dtype=np.int64)
+    finished = 0
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        _, reward, done = environment.step(move=rng.integers(-1, 2, shape),
+                                           angle=rng.uniform(-np.pi, 0, shape),
+                                           power=rng.uniform(MIN_FIRE_POWER, MAX_FIRE_POWER, shape),
+                                           fire=rng.random(shape) < 0.05,
+                                           weapon=rng.integers(0, 2, shape))
+        rewards += reward
+        finished += int(done.sum())
+    elapsed = time.perf_counter() - start
+    print("{} worlds x {} ticks in {:.2f} s: {:.0f} world-ticks/sec, {} finished games, mean score {}".format(
+        args.worlds, args.ticks, elapsed, args.worlds * args.ticks / elapsed, finished,
+        rewards.mean(axis=0).round(2).tolist()))
+
+
+if __name__ == "__main__":
+    main()
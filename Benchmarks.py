@@ -0,0 +1,306 @@
+import pygame as pg
+import numpy as np
+import argparse
+import gc
+import json
+import math
+import multiprocessing
+import platform
+import random as rand
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import GameItself as engine
+
+
+def draw_aim_full_screen(gun):
+    """
+    Drawing Gun the old way (aim through a new screen-sized translucent surface and barrel polygon), kept for
+    comparison
+    :param gun: Gun object - Artillery or Shotgun
+    """
+    trans_surface = pg.Surface((engine.SCREEN_WIDTH, engine.SCREEN_HEIGHT), pg.SRCALPHA)
+    pg.draw.polygon(trans_surface, engine.RED + (120,), gun.aim_polygon())
+    gun.surface.blit(trans_surface, (0, 0))
+    pg.draw.polygon(gun.surface, gun.color, gun.barrel_polygon())
+
+
+def benchmark_gun_draw(surface, repeats):
+    """
+    Measuring the time of drawing every Gun with full-screen aim surface (before) and with pre-rendered images
+    (after, both while the images are drawn for the first time and when they are taken from the cache)
+    :param surface: Pygame Surface object - target surface
+    :param repeats: int - number of draws for every Gun and mode
+    :return: dict - {gun type: {"before": ms per draw, "after": ms per draw, "cached": ms per draw}}
+    """
+    results = {}
+    for gun_class in (engine.Artillery, engine.Shotgun):
+        gun = gun_class(surface, [engine.SCREEN_WIDTH / 2, engine.SCREEN_HEIGHT - engine.GROUND_HEIGHT])
+        results[gun.get_type()] = {}
+        for mode, draw in (("before", draw_aim_full_screen), ("after", gun_class.draw), ("cached", gun_class.draw)):
+            start = time.perf_counter()
+            for i in range(repeats):
+                gun.angle = -math.pi * (i % 180) / 180
+                gun.fire_power = 10 + i % 41
+                draw(gun)
+            results[gun.get_type()][mode] = (time.perf_counter() - start) * 1000 / repeats
+    return results
+
+
+def make_invulnerable(game):
+    """
+    Preventing the end of the game, so scenario runs for the requested number of ticks
+    :param game: Gameplay object - benchmarked game
+    """
+    for tank in game.tanks_list:
+        tank.hit_points = 10 ** 9
+
+
+def spawn_balloons(game, amount):
+    """
+    Adding AirBalloon targets to the game
+    :param game: Gameplay object - benchmarked game
+    :param amount: int - number of targets
+    """
+    for _ in range(amount):
+        game.add_target(engine.AirBalloon(game.surface, game.rng))
+
+
+class Scenario:
+    """
+    Scripted stress scenario, that prepares Gameplay and acts on it before every tick
+    """
+
+    def __init__(self, name, balloons=0, airships=0, shotgun_period=0, bomb_period=0, particles_per_tick=0,
+                 bot=False):
+        """
+        Initializing a Scenario
+        :param name: string - name of scenario
+        :param balloons: int - number of AirBalloon targets at the start
+        :param airships: int - number of Airship targets at the start
+        :param shotgun_period: int - every Shotgun fires once in this number of ticks (0 - no fire)
+        :param bomb_period: int - every Airship drops a Bomb once in this number of ticks (0 - only random drops)
+        :param particles_per_tick: int - number of explosions created every tick
+        :param bot: bool - is the second Tank controlled by TankBot (its phase is timed by the profiler)
+        """
+        self.name = name
+        self.balloons = balloons
+        self.airships = airships
+        self.shotgun_period = shotgun_period
+        self.bomb_period = bomb_period
+        self.particles_per_tick = particles_per_tick
+        self.bot = bot
+
+    def setup(self, game):
+        """
+        Preparing the game
+        :param game: Gameplay object - benchmarked game
+        """
+        make_invulnerable(game)
+        spawn_balloons(game, self.balloons)
+        for _ in range(self.airships):
+            game.add_target(engine.Airship(game.surface, game.rng))
+        if self.shotgun_period:
+            for index, tank in enumerate(game.tanks_list):
+                game.guns_list[index] = engine.Shotgun(game.surface, tank.coordinates)
+
+    def act(self, game):
+        """
+        Acting on the game before the tick
+        :param game: Gameplay object - benchmarked game
+        """
+        tick = game.ticks
+        if self.shotgun_period and tick % self.shotgun_period == 0:
+            release = pg.event.Event(pg.MOUSEBUTTONUP, button=1, pos=(0, 0))
+            for gun in game.guns_list:
+                gun.angle = -math.pi * game.rng.uniform(0.1, 0.9)
+                gun.fire_power = game.rng.randint(20, 50)
+                game.projectiles.extend(gun.fire_end(release))
+        if self.bomb_period:
+            for index, target in enumerate(game.targets_list):
+                if target.get_type() == "Airship" and (tick + index) % self.bomb_period == 0:
+                    game.projectiles.add(target.drop_bomb())
+        for _ in range(self.particles_per_tick):
+            game.particles_list.append(engine.Particle.acquire(
+                game.surface,
+                (80, 80),
+                (game.rng.uniform(0, engine.SCREEN_WIDTH), game.rng.uniform(0, engine.SCREEN_HEIGHT)),
+                "air_explosion"))
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (
+    Scenario("shotgun_fire", shotgun_period=5),
+    Scenario("balloons_100", balloons=100, shotgun_period=10),
+    Scenario("balloons_1000", balloons=1000, shotgun_period=10),
+    Scenario("balloons_10000", balloons=10000, shotgun_period=10),
+    Scenario("airship_bombing", airships=200, bomb_period=60),
+    Scenario("particle_storm", particles_per_tick=50),
+    Scenario("airship_wave", airships=2000),
+    Scenario("bot_500_targets", balloons=300, airships=200, bomb_period=60, bot=True),
+)}
+
+
+def percentile(samples, part):
+    """
+    Request for the percentile of sorted samples
+    :param samples: list[float] - sorted samples
+    :param part: float - percentile from 0 to 1
+    :return: float - value of the percentile
+    """
+    return samples[min(len(samples) - 1, int(len(samples) * part))]
+
+
+def run_scenario(name, render, ticks, seed, size):
+    """
+    Running one scenario in the current process (is called in a fresh process, so peak RSS belongs to it)
+    :param name: string - name of scenario
+    :param render: bool - are objects drawn every tick
+    :param ticks: int - number of measured ticks
+    :param seed: int - seed of random numbers
+    :param size: list[int, int] - [width of screen, height of screen]
+    :return: dict - measured values
+    """
+    surface = engine.init_display(True, size)
+    scenario = SCENARIOS[name]
+    rand.seed(seed)
+    profiler = engine.FrameProfiler(window=ticks) if scenario.bot else None
+    game = engine.Gameplay(surface, True, render, profiler=profiler, seed=seed, bot=scenario.bot)
+    scenario.setup(game)
+
+    collections = sum(stats["collections"] for stats in gc.get_stats())
+    tick_times = []
+    start = time.perf_counter()
+    for _ in range(ticks):
+        tick_start = time.perf_counter_ns()
+        scenario.act(game)
+        game.step()
+        tick_times.append(time.perf_counter_ns() - tick_start)
+    elapsed = time.perf_counter() - start
+    collections = sum(stats["collections"] for stats in gc.get_stats()) - collections
+
+    allocation_ticks = max(1, ticks // 10)
+    tracemalloc.start()
+    allocated_before = tracemalloc.get_traced_memory()[0]
+    for _ in range(allocation_ticks):
+        scenario.act(game)
+        game.step()
+    allocated_after, allocated_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tick_times.sort()
+    result = {
+        "ticks": ticks,
+        "ticks_per_sec": ticks / elapsed,
+        "tick_ms_p50": percentile(tick_times, 0.5) / 1e6,
+        "tick_ms_p95": percentile(tick_times, 0.95) / 1e6,
+        "tick_ms_p99": percentile(tick_times, 0.99) / 1e6,
+        "gc_collections": collections,
+        "traced_growth_kib_per_tick": (allocated_after - allocated_before) / 1024 / allocation_ticks,
+        "traced_peak_kib": allocated_peak / 1024,
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "entities": game.count_entities(),
+    }
+    if scenario.bot:
+        result["bot_ms"] = profiler.percentiles("bot_acts")
+        result["bot_overruns"] = game.tank_bot.overruns
+    pg.quit()
+    return result
+
+
+def run_suite(names, modes, ticks, seed, size):
+    """
+    Running scenarios, every one in its own process
+    :param names: list[string] - names of scenarios
+    :param modes: list[string] - "sim" (simulation only) and/or "render" (simulation and drawing)
+    :param ticks: int - number of measured ticks
+    :param seed: int - seed of random numbers
+    :param size: list[int, int] - [width of screen, height of screen]
+    :return: dict - {"scenario/mode": measured values}
+    """
+    results = {}
+    for name in names:
+        for mode in modes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                results[name + "/" + mode] = executor.submit(run_scenario, name, mode == "render", ticks, seed,
+                                                             size).result()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Searching for regressions of ticks per second compared to the baseline
+    :param results: dict - {"scenario/mode": measured values}
+    :param baseline: dict - results of previous run
+    :param tolerance: float - allowed relative slowdown (0.1 - 10%)
+    :return: list[string] - descriptions of regressions
+    """
+    regressions = []
+    for key, values in results.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]["ticks_per_sec"]
+        new = values["ticks_per_sec"]
+        if new < old * (1 - tolerance):
+            regressions.append("{}: {:.0f} -> {:.0f} ticks/sec ({:+.1%})".format(key, old, new, new / old - 1))
+    return regressions
+
+
+def main(args=None):
+    """
+    Running the benchmarks
+    :param args: list[string] - command line arguments, sys.argv if not given
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks of SimpleArtGame")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help="scenarios to run (default: all)")
+    parser.add_argument("--modes", nargs="+", default=["sim", "render"], choices=["sim", "render"])
+    parser.add_argument("--ticks", type=int, default=500, help="number of measured ticks in every scenario")
+    parser.add_argument("--seed", type=int, default=0, help="seed of random numbers")
+    parser.add_argument("--repeats", type=int, default=200, help="number of draws for every Gun")
+    parser.add_argument("--size", type=int, nargs=2, default=[1920, 1080], metavar=("WIDTH", "HEIGHT"),
+                        help="screen size")
+    parser.add_argument("--output", default=None, metavar="PATH", help="write results to .json file")
+    parser.add_argument("--compare", default=None, metavar="PATH", help="compare with results from .json file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative slowdown for --compare")
+    args = parser.parse_args(args)
+
+    results = run_suite(args.scenarios, args.modes, args.ticks, args.seed, args.size)
+
+    surface = engine.init_display(True, args.size)
+    gun_draw = benchmark_gun_draw(surface, args.repeats)
+    pg.quit()
+
+    print("{:<28}{:>12}{:>10}{:>10}{:>10}{:>8}{:>12}".format("scenario", "ticks/sec", "p50 ms", "p95 ms", "p99 ms",
+                                                             "gc", "RSS MiB"))
+    for key, values in results.items():
+        print("{:<28}{:>12.0f}{:>10.3f}{:>10.3f}{:>10.3f}{:>8}{:>12.1f}".format(
+            key, values["ticks_per_sec"], values["tick_ms_p50"], values["tick_ms_p95"], values["tick_ms_p99"],
+            values["gc_collections"], values["peak_rss_kib"] / 1024))
+    for key, values in results.items():
+        if "bot_ms" in values:
+            print("{} TankBot: p50 {:.3f} ms, p95 {:.3f} ms, p99 {:.3f} ms, {} ticks over budget".format(
+                key, values["bot_ms"]["p50"], values["bot_ms"]["p95"], values["bot_ms"]["p99"],
+                values["bot_overruns"]))
+    for gun_type, times in gun_draw.items():
+        print("{}.draw: {:.3f} ms full-screen aim, {:.3f} ms new sprites, {:.3f} ms cached sprites".format(
+            gun_type, times["before"], times["after"], times["cached"]))
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump({"meta": {"python": platform.python_version(), "pygame": pg.version.ver,
+                                "numpy": np.__version__, "size": args.size, "ticks": args.ticks, "seed": args.seed},
+                       "results": results, "gun_draw": gun_draw}, file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file)["results"], args.tolerance)
+        for regression in regressions:
+            print("Regression: " + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
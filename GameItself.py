@@ -1,12 +1,23 @@
 import pygame as pg
+import numpy as np
+import argparse
+import csv
+import heapq
+import json
 import math
+import os
 import random as rand
+import time
+from collections import OrderedDict, deque
+from itertools import chain, compress
 
-pg.init()
+import Trajectory
 
 FPS = 120
-SCREEN_WIDTH = pg.display.Info().current_w
-SCREEN_HEIGHT = pg.display.Info().current_h
+TICK_RATE = 120
+MAX_CATCH_UP_TICKS = 10
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
 
 SKY = (95, 204, 250)
 GREY = (28, 43, 28)
@@ -15,6 +26,306 @@ RED = (184, 59, 28)
 GRAVITATION = 0.9
 GROUND_HEIGHT = 250
 
+WORLD_MARGIN = 512
+CULL_MARGIN = 16
+
+GRID_CELL_SIZE = 128
+MAX_PROJECTILE_RAD = 10
+
+KIND_NONE = 0
+KIND_SHELL = 1
+KIND_SHRAPNEL = 2
+KIND_BOMB = 3
+
+LAYER_GUNS = 0
+LAYER_VEHICLES = 1
+LAYER_PROJECTILES = 2
+LAYER_PARTICLES = 3
+LAYERS_NUMBER = 4
+
+ANGLE_BUCKETS = 720
+ANGLE_STEP = 2 * math.pi / ANGLE_BUCKETS
+
+INPUT_EVENT_TYPES = (pg.QUIT, pg.KEYDOWN, pg.KEYUP, pg.MOUSEMOTION, pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP)
+UNUSED_EVENT_TYPES = (pg.TEXTEDITING, pg.TEXTINPUT, pg.MOUSEWHEEL, pg.FINGERMOTION, pg.FINGERDOWN, pg.FINGERUP,
+                      pg.JOYAXISMOTION, pg.JOYBALLMOTION, pg.JOYHATMOTION)
+KEY_BINDINGS = {"switch_tank": pg.K_SPACE,
+                "switch_gun": pg.K_LCTRL,
+                "left_tank_right": pg.K_d,
+                "left_tank_left": pg.K_a,
+                "right_tank_right": pg.K_RIGHT,
+                "right_tank_left": pg.K_LEFT}
+
+TEXTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "textures")
+
+
+class TextureCache:
+    """
+    Storage of textures, that loads every .png file only once and keeps scaled and flipped variants of them
+    """
+
+    def __init__(self, directory, max_variants=256):
+        """
+        Initializing a TextureCache
+        :param directory: string - path to the folder with .png files
+        :param max_variants: int - maximum number of scaled and flipped variants kept at the same time
+        """
+        self.directory = directory
+        self.max_variants = max_variants
+        self.originals = {}
+        self.variants = OrderedDict()
+        self.masks = OrderedDict()
+
+    def load_all(self):
+        """
+        Loading every .png file from the folder and converting it to the display format (if display is set)
+        """
+        self.originals = {}
+        self.variants = OrderedDict()
+        self.masks = OrderedDict()
+        for file_name in sorted(os.listdir(self.directory)):
+            name, extension = os.path.splitext(file_name)
+            if extension == ".png":
+                self.originals[name] = self.load(file_name)
+
+    def load(self, file_name):
+        """
+        Loading one file from the disk
+        :param file_name: string - name of .png file
+        :return: Pygame Surface object - loaded texture
+        """
+        texture = pg.image.load(os.path.join(self.directory, file_name))
+        if pg.display.get_surface() is not None:
+            texture = texture.convert_alpha()
+        return texture
+
+    def get_original(self, name):
+        """
+        Request for the texture in its original size
+        :param name: string - name of texture (name of .png file without extension)
+        :return: Pygame Surface object - original texture
+        """
+        if name not in self.originals:
+            self.originals[name] = self.load(name + ".png")
+        return self.originals[name]
+
+    def get(self, name, size, flip=False):
+        """
+        Request for the scaled (and flipped on the x if needed) texture
+        :param name: string - name of texture (name of .png file without extension)
+        :param size: list[float, float] - [size on the x, size on the y]
+        :param flip: bool - is texture flipped on the x
+        :return: Pygame Surface object - scaled texture
+        """
+        key = (name, int(size[0]), int(size[1]), bool(flip))
+        texture = self.variants.get(key)
+        if texture is not None:
+            self.variants.move_to_end(key)
+            return texture
+        texture = pg.transform.scale(self.get_original(name), (key[1], key[2]))
+        if flip:
+            texture = pg.transform.flip(texture, True, False)
+        self.variants[key] = texture
+        if len(self.variants) > self.max_variants:
+            self.variants.popitem(last=False)
+        return texture
+
+    def get_mask(self, name, size, flip=False, rad=0):
+        """
+        Request for the pixel mask of the scaled (and flipped on the x if needed) texture, grown by the radius if it is
+        given: bit (x, y) of the grown mask is set, if circle_mask(rad) put at (x - 2 * rad + 1, y - 2 * rad + 1)
+        overlaps the texture
+        :param name: string - name of texture (name of .png file without extension)
+        :param size: list[float, float] - [size on the x, size on the y]
+        :param flip: bool - is texture flipped on the x
+        :param rad: int - radius of the circle, that grows the mask (0 - the mask is not grown)
+        :return: Pygame Mask object - mask of opaque pixels
+        """
+        key = (name, int(size[0]), int(size[1]), bool(flip), rad)
+        mask = self.masks.get(key)
+        if mask is not None:
+            self.masks.move_to_end(key)
+            return mask
+        if rad:
+            mask = self.get_mask(name, size, flip).convolve(circle_mask(rad))
+        else:
+            mask = pg.mask.from_surface(self.get(name, size, flip))
+        self.masks[key] = mask
+        if len(self.masks) > self.max_variants:
+            self.masks.popitem(last=False)
+        return mask
+
+
+CIRCLE_MASKS = {}
+
+
+def circle_mask(rad):
+    """
+    Request for the pixel mask of the circle (masks are created once for every radius)
+    :param rad: int - radius of circle
+    :return: Pygame Mask object - mask of the circle
+    """
+    mask = CIRCLE_MASKS.get(rad)
+    if mask is None:
+        circle = pg.Surface((2 * rad, 2 * rad), pg.SRCALPHA)
+        pg.draw.circle(circle, (0, 0, 0), (rad, rad), rad)
+        mask = pg.mask.from_surface(circle)
+        CIRCLE_MASKS[rad] = mask
+    return mask
+
+
+def segment_steps(dx, dy):
+    """
+    Request for the number of steps along the segment from (0, 0) to (dx, dy) (one step for every pixel on the
+    longer axis)
+    :param dx: int - displacement on the x
+    :param dy: int - displacement on the y
+    :return: int - number of steps
+    """
+    return max(abs(dx), abs(dy), 1)
+
+
+def segment_pixels(dx, dy, first=0):
+    """
+    Request for the pixels of the segment from (0, 0) to (dx, dy), one for every step from the step first
+    :param dx: int - displacement on the x
+    :param dy: int - displacement on the y
+    :param first: int - number of the first step
+    :return: generator[tuple[int, int]] - pixels from the first step to the end
+    """
+    steps = segment_steps(dx, dy)
+    return ((round(dx * step / steps), round(dy * step / steps)) for step in range(first, steps + 1))
+
+
+LINE_MASKS = {}
+
+
+def line_mask(dx, dy):
+    """
+    Request for the pixel mask of the segment from (0, 0) to (dx, dy) moved by (-min(dx, 0), -min(dy, 0)) into the
+    mask (masks are created once for every displacement)
+    :param dx: int - displacement on the x
+    :param dy: int - displacement on the y
+    :return: Pygame Mask object - mask of the segment
+    """
+    mask = LINE_MASKS.get((dx, dy))
+    if mask is None:
+        mask = pg.Mask((abs(dx) + 1, abs(dy) + 1))
+        for x, y in segment_pixels(dx, dy):
+            mask.set_at((x - min(dx, 0), y - min(dy, 0)))
+        LINE_MASKS[(dx, dy)] = mask
+    return mask
+
+
+CIRCLE_SPRITES = {}
+
+
+def circle_sprite(rad, color):
+    """
+    Request for the image of the circle (images are drawn once for every radius and color)
+    :param rad: int - radius of circle
+    :param color: tuple[int, int, int] or string - color of circle
+    :return: Pygame Surface object - image of the circle
+    """
+    sprite = CIRCLE_SPRITES.get((rad, color))
+    if sprite is None:
+        sprite = pg.Surface((2 * rad, 2 * rad), pg.SRCALPHA)
+        pg.draw.circle(sprite, color, (rad, rad), rad)
+        if pg.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        CIRCLE_SPRITES[(rad, color)] = sprite
+    return sprite
+
+
+SIN_TABLE = [math.sin(bucket * ANGLE_STEP) for bucket in range(ANGLE_BUCKETS)]
+COS_TABLE = [math.cos(bucket * ANGLE_STEP) for bucket in range(ANGLE_BUCKETS)]
+
+
+def angle_bucket(angle):
+    """
+    Request for the nearest of ANGLE_BUCKETS quantized angles (index in SIN_TABLE and COS_TABLE)
+    :param angle: float - angle in radians
+    :return: int - angle bucket
+    """
+    return round(angle / ANGLE_STEP) % ANGLE_BUCKETS
+
+
+TEXTURES = TextureCache(TEXTURES_DIRECTORY)
+
+
+def init_display(headless=False, size=None):
+    """
+    Initializing pygame and opening the display (screen size is stored in SCREEN_WIDTH and SCREEN_HEIGHT)
+    :param headless: bool - is game simulated without a window (dummy video driver)
+    :param size: list[int, int] - [width of screen, height of screen], full screen size (or 1920x1080 if headless)
+                 if not given
+    :return: Pygame Surface object - display surface
+    """
+    global SCREEN_WIDTH, SCREEN_HEIGHT
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pg.init()
+    if size is None and not headless:
+        size = (pg.display.Info().current_w, pg.display.Info().current_h)
+    elif size is None:
+        size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+    SCREEN_WIDTH, SCREEN_HEIGHT = int(size[0]), int(size[1])
+    surface = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    TEXTURES.load_all()
+    return surface
+
+
+def box_rect(center, size):
+    """
+    Request for the rectangle covered by the image (with one pixel margin for rounding)
+    :param center: list[float, float] - [x coordinate of center, y coordinates of center]
+    :param size: list[float, float] - [size on the x, size on the y]
+    :return: Pygame Rect object - covered rectangle
+    """
+    left = math.floor(center[0] - size[0] / 2) - 1
+    top = math.floor(center[1] - size[1] / 2) - 1
+    return pg.Rect(left, top, math.ceil(size[0]) + 3, math.ceil(size[1]) + 3)
+
+
+def interpolate(previous, current, alpha):
+    """
+    Request for the point between the previous and the current positions (for drawing between simulation ticks)
+    :param previous: list[float, float] - coordinates before the last tick (or None)
+    :param current: list[float, float] - coordinates after the last tick
+    :param alpha: float - part of the tick passed since the last tick (from 0 to 1)
+    :return: list[float, float] - interpolated coordinates
+    """
+    if previous is None or alpha >= 1:
+        return current
+    return [previous[0] + (current[0] - previous[0]) * alpha, previous[1] + (current[1] - previous[1]) * alpha]
+
+
+def is_visible(center, size):
+    """
+    Check if the image can be seen on the screen (with CULL_MARGIN for the movement between ticks)
+    :param center: list[float, float] - [x coordinate of center, y coordinates of center]
+    :param size: list[float, float] - [size on the x, size on the y]
+    :return: bool - does the image overlap the screen
+    """
+    half_width = size[0] / 2 + CULL_MARGIN
+    half_height = size[1] / 2 + CULL_MARGIN
+    return (-half_width < center[0] < SCREEN_WIDTH + half_width and
+            -half_height < center[1] < SCREEN_HEIGHT + half_height)
+
+
+def points_rect(points):
+    """
+    Request for the bounding rectangle of the points (with one pixel margin for rounding)
+    :param points: list[list[float, float]] - points
+    :return: Pygame Rect object - bounding rectangle
+    """
+    left = math.floor(min(point[0] for point in points))
+    top = math.floor(min(point[1] for point in points))
+    right = math.ceil(max(point[0] for point in points))
+    bottom = math.ceil(max(point[1] for point in points))
+    return pg.Rect(left - 1, top - 1, right - left + 3, bottom - top + 3)
+
 
 class ControlButtons:
     """
@@ -30,35 +341,291 @@ class ControlButtons:
         self.to_left = buttons[1]
 
 
+class ObjectPool:
+    """
+    Storage of released objects of one class, that are reused instead of creating new ones
+    """
+
+    def __init__(self, object_class, capacity=4096):
+        """
+        Initializing an ObjectPool
+        :param object_class: class - class of stored objects (with reset method taking arguments of __init__)
+        :param capacity: int - maximum number of stored objects
+        """
+        self.object_class = object_class
+        self.capacity = capacity
+        self.free = []
+
+    def acquire(self, *args):
+        """
+        Taking a released object (or creating a new one if there are none) and setting it to the initial state
+        :return: object of the class
+        """
+        if self.free:
+            reused_object = self.free.pop()
+            reused_object.reset(*args)
+            return reused_object
+        return self.object_class(*args)
+
+    def release(self, released_object):
+        """
+        Returning the object to the pool
+        :param released_object: object of the class - object, that is no longer used
+        """
+        if len(self.free) < self.capacity:
+            self.free.append(released_object)
+
+
+class EntityList:
+    """
+    List of entities with O(1) removal: removed entities are only marked (and skipped by iteration) until the end of
+    the tick, when they are swapped with the last entities and cut off. Every entity gets a handle
+    (slot, generation), that stops resolving after the entity is removed
+    """
+
+    def __init__(self, entities=()):
+        """
+        Initializing an EntityList
+        :param entities: list[object] - initial entities
+        """
+        self.items = []
+        self.alive = []
+        self.item_slots = []
+        self.slot_items = []
+        self.generations = []
+        self.free_slots = []
+        self.removed = []
+        for entity in entities:
+            self.add(entity)
+
+    def __len__(self):
+        return len(self.items) - len(self.removed)
+
+    def __iter__(self):
+        return compress(self.items, self.alive)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __setitem__(self, index, entity):
+        slot = self.item_slots[index]
+        self.generations[slot] += 1
+        self.items[index] = entity
+        entity.handle = (slot, self.generations[slot])
+
+    def add(self, entity):
+        """
+        Adding an entity to the end of the list
+        :param entity: object - added entity
+        :return: tuple[int, int] - handle of entity
+        """
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slot_items[slot] = len(self.items)
+        else:
+            slot = len(self.slot_items)
+            self.slot_items.append(len(self.items))
+            self.generations.append(0)
+        self.items.append(entity)
+        self.alive.append(True)
+        self.item_slots.append(slot)
+        entity.handle = (slot, self.generations[slot])
+        return entity.handle
+
+    append = add
+
+    def extend(self, entities):
+        """
+        Adding several entities
+        :param entities: list[object] - added entities
+        """
+        for entity in entities:
+            self.add(entity)
+
+    def get(self, handle):
+        """
+        Request for the entity by its handle
+        :param handle: tuple[int, int] - handle of entity
+        :return: object - entity (None if it was removed)
+        """
+        slot, generation = handle
+        if slot >= len(self.generations) or self.generations[slot] != generation:
+            return None
+        index = self.slot_items[slot]
+        return self.items[index] if self.alive[index] else None
+
+    def index(self, entity):
+        """
+        Request for the position of entity in the list
+        :param entity: object - entity from the list
+        :return: int - index of entity
+        """
+        return self.slot_items[entity.handle[0]]
+
+    def remove(self, entity):
+        """
+        Marking the entity as removed (it is cut off from the list at the end of the tick)
+        :param entity: object - removed entity
+        """
+        slot, generation = entity.handle
+        index = self.slot_items[slot]
+        if self.generations[slot] == generation and self.alive[index]:
+            self.alive[index] = False
+            self.removed.append(index)
+
+    def compact(self):
+        """
+        Cutting off removed entities, every one is replaced by the last entity of the list
+        :return: list[object] - removed entities
+        """
+        removed_entities = []
+        for index in sorted(self.removed, reverse=True):
+            entity = self.items[index]
+            slot = self.item_slots[index]
+            self.generations[slot] += 1
+            self.free_slots.append(slot)
+            removed_entities.append(entity)
+            last = len(self.items) - 1
+            if index != last:
+                self.items[index] = self.items[last]
+                self.alive[index] = self.alive[last]
+                self.item_slots[index] = self.item_slots[last]
+                self.slot_items[self.item_slots[index]] = index
+            self.items.pop()
+            self.alive.pop()
+            self.item_slots.pop()
+        self.removed = []
+        return removed_entities
+
+
+class EventScheduler:
+    """
+    Priority queue (binary heap) of events ordered by the tick, when they are due, events of one tick are returned
+    in the order of scheduling. Only due events are touched, so waiting events cost nothing per tick
+    """
+
+    def __init__(self):
+        """
+        Initializing an EventScheduler
+        """
+        self.events = []
+        self.counter = 0
+
+    def __len__(self):
+        return len(self.events)
+
+    def schedule(self, tick, event):
+        """
+        Adding an event
+        :param tick: float - tick, when the event is due
+        :param event: object - event itself
+        """
+        heapq.heappush(self.events, (tick, self.counter, event))
+        self.counter += 1
+
+    def pop_due(self, tick):
+        """
+        Taking all events, that are due by the tick
+        :param tick: float - current tick
+        :return: list[object] - due events
+        """
+        due = []
+        while self.events and self.events[0][0] <= tick:
+            due.append(heapq.heappop(self.events)[2])
+        return due
+
+
+def exponential_interval(rate, rng=rand):
+    """
+    Request for the time between two random events, that happen independently with the average rate
+    :param rate: float - average number of events per second
+    :param rng: Random object - source of random numbers (global random module if not given)
+    :return: float - time until the next event in ticks (infinity if rate is 0)
+    """
+    if rate <= 0:
+        return math.inf
+    return rng.expovariate(rate / TICK_RATE)
+
+
 class Particle:
     """
     Temporary image of effect that fade quickly
     """
 
+    __slots__ = ("surface", "size", "coordinates", "texture", "lifetime", "age", "handle")
+
     def __init__(self, surface, size, coordinates, texture):
         """
         Initializing a Particle
         :param surface: Pygame Surface object - target surface
         :param size: list[float, float] - [size on the x, size on the y]
         :param coordinates: list[float, float] - [x coordinate of center, y coordinates of center]
-        :param texture: string - name of .png file
+        :param texture: string - name of texture (name of .png file without extension)
+        """
+        self.reset(surface, size, coordinates, texture)
+
+    def reset(self, surface, size, coordinates, texture):
+        """
+        Setting a Particle to its initial state (when it is created or taken from the pool)
+        :param surface: Pygame Surface object - target surface
+        :param size: list[float, float] - [size on the x, size on the y]
+        :param coordinates: list[float, float] - [x coordinate of center, y coordinates of center]
+        :param texture: string - name of texture (name of .png file without extension)
         """
         self.surface = surface
         self.size = size
         self.coordinates = coordinates
-        self.texture = pg.transform.scale(pg.image.load(texture), (self.size[0], self.size[1]))
-        self.lifetime = FPS * 1
+        self.texture = TEXTURES.get(texture, self.size)
+        self.lifetime = TICK_RATE * 1
         self.age = 0
 
-    def draw(self):
+    @classmethod
+    def acquire(cls, surface, size, coordinates, texture):
+        """
+        Taking a Particle from the pool (or creating a new one if the pool is empty)
+        :param surface: Pygame Surface object - target surface
+        :param size: list[float, float] - [size on the x, size on the y]
+        :param coordinates: list[float, float] - [x coordinate of center, y coordinates of center]
+        :param texture: string - name of texture (name of .png file without extension)
+        :return: Particle object - new Particle
+        """
+        return cls.pool.acquire(surface, size, coordinates, texture)
+
+    def release(self):
+        """
+        Returning the Particle to the pool
+        """
+        self.pool.release(self)
+
+    def draw(self, alpha=1):
         """
         Drawing a Particle
+        :param alpha: float - part of the tick passed since the last tick (Particle does not move)
+        """
+        self.surface.blit(*self.get_sprite(alpha))
+
+    def is_visible(self):
+        """
+        Check if the Particle can be seen on the screen
+        :return: bool - does the texture overlap the screen
         """
-        rect_draw_box = (self.coordinates[0] - self.size[0] / 2,
-                         self.coordinates[1] - self.size[1] / 2,
-                         self.size[0],
-                         self.size[1])
-        self.surface.blit(self.texture, rect_draw_box)
+        return is_visible(self.coordinates, self.size)
+
+    def get_sprite(self, alpha=1):
+        """
+        Request for the image of the Particle and its position
+        :param alpha: float - part of the tick passed since the last tick (Particle does not move)
+        :return: tuple[Pygame Surface object, tuple[float, float]] - (texture, top left corner)
+        """
+        return self.texture, (self.coordinates[0] - self.size[0] / 2, self.coordinates[1] - self.size[1] / 2)
+
+    def get_draw_box(self, alpha=1):
+        """
+        Request for the rectangle covered by the Particle
+        :param alpha: float - part of the tick passed since the last tick (Particle does not move)
+        :return: Pygame Rect object - covered rectangle
+        """
+        return box_rect(self.coordinates, self.size)
 
     def aging(self):
         """
@@ -81,6 +648,9 @@ class Particle:
         return self.lifetime
 
 
+Particle.pool = ObjectPool(Particle)
+
+
 class Ground:
     """
     Flat ground located at the bottom of the screen
@@ -92,25 +662,216 @@ class Ground:
         :param surface: Pygame Surface object - target surface
         """
         self.surface = surface
-        self.draw_box = (0, SCREEN_HEIGHT - GROUND_HEIGHT, SCREEN_WIDTH, GROUND_HEIGHT)
-        self.texture = pg.transform.scale(pg.image.load("textures/ground.png"), (SCREEN_WIDTH, GROUND_HEIGHT))
+        self.draw_box = None
+        self.texture = None
+        self.resize()
+
+    def resize(self, size=None):
+        """
+        Fitting a Ground to the size of the surface
+        :param size: tuple[int, int] - (width, height) of the surface, current screen size if not given
+        """
+        width, height = (SCREEN_WIDTH, SCREEN_HEIGHT) if size is None else size
+        self.draw_box = (0, height - GROUND_HEIGHT, width, GROUND_HEIGHT)
+        self.texture = TEXTURES.get("ground", (width, GROUND_HEIGHT))
 
-    def draw(self):
+    def draw(self, surface=None):
         """
         Drawing a Ground
+        :param surface: Pygame Surface object - surface to draw on (target surface of Ground if not given)
         """
-        self.surface.blit(self.texture, self.draw_box)
+        (surface or self.surface).blit(self.texture, self.draw_box)
 
 
-def is_in_hitbox_part(point, hitbox_part):
+class Background:
     """
-    Check if point is in a part of hitbox
-    :param point: list[float, float] - [x coordinate of point, y coordinates of point]
-    :param hitbox_part: list[4 x float] - [x coordinate of center, y coordinates of center,
-                                           distance to the edge on x, distance to the edge on y]
-    :return: bool - is point in a part of hitbox
+    Static part of the scene: sky color and layers of scenery (Ground and any other object with resize and draw
+    methods) baked into one surface in the display format, which is blitted instead of drawing them every frame
     """
-    return abs(point[0] - hitbox_part[0]) < hitbox_part[2] and abs(point[1] - hitbox_part[1]) < hitbox_part[3]
+
+    def __init__(self, color, layers=()):
+        """
+        Initializing a Background
+        :param color: tuple[int, int, int] - color of the sky
+        :param layers: list - static objects drawn over the sky in the given order
+        """
+        self.color = color
+        self.layers = list(layers)
+        self.surface = None
+        self.bake()
+
+    def add_layer(self, layer):
+        """
+        Adding static scenery over the existing layers
+        :param layer: object with resize and draw methods - new layer
+        """
+        self.layers.append(layer)
+        self.bake(self.surface.get_size())
+
+    def bake(self, size=None):
+        """
+        Drawing the sky and every layer on a surface of the given size
+        :param size: tuple[int, int] - (width, height) of the surface, current screen size if not given
+        """
+        if size is None:
+            size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.surface = pg.Surface(size)
+        if pg.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.surface.fill(self.color)
+        for layer in self.layers:
+            layer.resize(size)
+            layer.draw(self.surface)
+
+    def check_size(self, target):
+        """
+        Baking the Background again at the size of the target, if it differs (the resolution has changed)
+        :param target: Pygame Surface object - surface the Background is drawn on
+        """
+        if target.get_size() != self.surface.get_size():
+            self.bake(target.get_size())
+
+    def draw(self, target):
+        """
+        Drawing the whole Background
+        :param target: Pygame Surface object - surface to draw on
+        """
+        self.check_size(target)
+        target.blit(self.surface, (0, 0))
+
+    def restore(self, target, rects):
+        """
+        Drawing parts of the Background over the previous frame
+        :param target: Pygame Surface object - surface to draw on
+        :param rects: list[Pygame Rect object] - restored rectangles
+        """
+        self.check_size(target)
+        target.blits([(self.surface, rect, rect) for rect in rects], doreturn=False)
+
+
+class RenderQueue:
+    """
+    Lists of images with their positions for every layer, that are drawn with one blits call per layer
+    """
+
+    def __init__(self, layers_number=LAYERS_NUMBER):
+        """
+        Initializing a RenderQueue
+        :param layers_number: int - number of layers (layers with lower index are drawn first)
+        """
+        self.layers = [[] for _ in range(layers_number)]
+
+    def submit(self, layer, sprite):
+        """
+        Adding an image to the layer
+        :param layer: int - index of layer
+        :param sprite: tuple[Pygame Surface object, tuple[float, float]] - (image, top left corner)
+        """
+        self.layers[layer].append(sprite)
+
+    def extend(self, layer, sprites):
+        """
+        Adding several images to the layer
+        :param layer: int - index of layer
+        :param sprites: iterable[tuple[Pygame Surface object, tuple[float, float]]] - (image, top left corner)
+        """
+        self.layers[layer].extend(sprites)
+
+    def flush(self, target):
+        """
+        Drawing all images layer by layer and emptying the queue
+        :param target: Pygame Surface object - surface to draw on
+        """
+        for sprites in self.layers:
+            if sprites:
+                target.blits(sprites, doreturn=False)
+                sprites.clear()
+
+
+class SpatialHash:
+    """
+    Uniform grid of square cells, that stores vehicles in every cell overlapped by their hitbox bounding box
+    """
+
+    def __init__(self, cell_size, margin=0):
+        """
+        Initializing a SpatialHash
+        :param cell_size: float - length of the cell side
+        :param margin: float - extension of every bounding box (maximum radius of projectile), so the only cell
+                       containing the center of projectile has to be checked
+        """
+        self.cell_size = cell_size
+        self.margin = margin
+        self.cells = {}
+
+    def clear(self):
+        """
+        Removing every vehicle from the grid
+        """
+        self.cells = {}
+
+    def cell_range(self, veh):
+        """
+        Request for the cells overlapped by the bounding box of the Vehicle
+        :param veh: Vehicle object - checked Vehicle
+        :return: tuple[4 x int] - (first cell on the x, last cell on the x, first cell on the y, last cell on the y)
+        """
+        left, top, right, bottom = veh.get_aabb()
+        cell_size = self.cell_size
+        margin = self.margin
+        return (int((left - margin) // cell_size), int((right + margin) // cell_size),
+                int((top - margin) // cell_size), int((bottom + margin) // cell_size))
+
+    def insert(self, veh):
+        """
+        Adding the Vehicle to every cell overlapped by its bounding box
+        :param veh: Vehicle object - added Vehicle
+        """
+        veh.grid_cells = self.cell_range(veh)
+        first_x, last_x, first_y, last_y = veh.grid_cells
+        cells = self.cells
+        for cell_x in range(first_x, last_x + 1):
+            for cell_y in range(first_y, last_y + 1):
+                cell = cells.get((cell_x, cell_y))
+                if cell is None:
+                    cells[(cell_x, cell_y)] = [veh]
+                else:
+                    cell.append(veh)
+
+    def remove(self, veh):
+        """
+        Removing the Vehicle from every cell it was added to
+        :param veh: Vehicle object - removed Vehicle
+        """
+        if veh.grid_cells is None:
+            return
+        first_x, last_x, first_y, last_y = veh.grid_cells
+        cells = self.cells
+        for cell_x in range(first_x, last_x + 1):
+            for cell_y in range(first_y, last_y + 1):
+                cell = cells[(cell_x, cell_y)]
+                cell.remove(veh)
+                if not cell:
+                    del cells[(cell_x, cell_y)]
+        veh.grid_cells = None
+
+    def update(self, veh):
+        """
+        Moving the Vehicle to other cells if its bounding box now overlaps other cells
+        :param veh: Vehicle object - moved Vehicle
+        """
+        if veh.grid_cells != self.cell_range(veh):
+            self.remove(veh)
+            self.insert(veh)
+
+    def rebuild(self, vehicles):
+        """
+        Filling the grid anew with vehicles in their current positions
+        :param vehicles: list[Vehicle object] - vehicles stored in the grid
+        """
+        self.clear()
+        for veh in vehicles:
+            self.insert(veh)
 
 
 class Projectile:
@@ -118,6 +879,9 @@ class Projectile:
     Abstract class of projectile, that can move and interact with environment
     """
 
+    __slots__ = ("surface", "rad", "damage", "kind", "store", "row", "own_coordinates", "own_previous_coordinates",
+                 "own_velocity", "color", "owner")
+
     def __init__(self, surface, coordinates, velocity):
         """
         Initializing a Projectile
@@ -125,61 +889,129 @@ class Projectile:
         :param coordinates: list[float, float] - [x coordinate of center, y coordinates of center]
         :param velocity: list[float, float] - [x velocity, y velocity]
         """
+        self.reset(surface, coordinates, velocity)
+
+    def reset(self, surface, coordinates, velocity):
+        """
+        Setting a Projectile to its initial state (when it is created or taken from the pool)
+        :param surface: Pygame Surface object - target surface
+        :param coordinates: list[float, float] - [x coordinate of center, y coordinates of center]
+        :param velocity: list[float, float] - [x velocity, y velocity]
+        """
         self.surface = surface
         self.rad = 0
         self.damage = 0
-        self.coordinates = coordinates
-        self.velocity = velocity
+        self.kind = KIND_NONE
+        self.store = None
+        self.row = 0
+        self.own_coordinates = coordinates
+        self.own_previous_coordinates = [coordinates[0], coordinates[1]]
+        self.own_velocity = velocity
         self.color = "#000000"
+        self.owner = -1
 
-    def draw(self):
+    @classmethod
+    def acquire(cls, surface, coordinates, velocity):
         """
-        Drawing a Projectile
+        Taking a Projectile from the pool of its class (or creating a new one if the pool is empty)
+        :param surface: Pygame Surface object - target surface
+        :param coordinates: list[float, float] - [x coordinate of center, y coordinates of center]
+        :param velocity: list[float, float] - [x velocity, y velocity]
+        :return: Projectile object - new Projectile
         """
-        pg.draw.circle(self.surface, self.color, (self.coordinates[0], self.coordinates[1]), self.rad)
+        return cls.pool.acquire(surface, coordinates, velocity)
 
-    def move(self):
+    def release(self):
         """
-        Moving a Projectile within a time unit
+        Returning the Projectile to the pool of its class
         """
-        self.velocity[1] += GRAVITATION
-        self.coordinates[0] += self.velocity[0]
-        self.coordinates[1] += self.velocity[1]
+        self.pool.release(self)
+
+    @property
+    def coordinates(self):
+        """
+        Request for the coordinates (row of the ProjectileStore if Projectile is stored there)
+        :return: list[float, float] - [x coordinate of center, y coordinates of center]
+        """
+        if self.store is None:
+            return self.own_coordinates
+        return self.store.coordinates[self.row]
+
+    @coordinates.setter
+    def coordinates(self, coordinates):
+        """
+        Setting the coordinates
+        :param coordinates: list[float, float] - [x coordinate of center, y coordinates of center]
+        """
+        if self.store is None:
+            self.own_coordinates = coordinates
+        else:
+            self.store.coordinates[self.row] = coordinates
+
+    @property
+    def previous_coordinates(self):
+        """
+        Request for the coordinates before the last time unit
+        :return: list[float, float] - [x coordinate of center, y coordinates of center]
+        """
+        if self.store is None:
+            return self.own_previous_coordinates
+        return self.store.previous_coordinates[self.row]
+
+    @property
+    def velocity(self):
+        """
+        Request for the velocity (row of the ProjectileStore if Projectile is stored there)
+        :return: list[float, float] - [x velocity, y velocity]
+        """
+        if self.store is None:
+            return self.own_velocity
+        return self.store.velocities[self.row]
+
+    @velocity.setter
+    def velocity(self, velocity):
+        """
+        Setting the velocity
+        :param velocity: list[float, float] - [x velocity, y velocity]
+        """
+        if self.store is None:
+            self.own_velocity = velocity
+        else:
+            self.store.velocities[self.row] = velocity
+
+    def draw(self, alpha=1):
+        """
+        Drawing a Projectile
+        :param alpha: float - part of the tick passed since the last tick
+        """
+        self.surface.blit(*self.get_sprite(alpha))
 
-    def is_hit_vehicle(self, veh):
+    def get_sprite(self, alpha=1):
         """
-        Check if Projectile hit the Vehicle
-        :param veh: Vehicle object - the Vehicle with which collision is checked
-        :return: bool - is Vehicle hit
+        Request for the image of the Projectile and its position
+        :param alpha: float - part of the tick passed since the last tick
+        :return: tuple[Pygame Surface object, tuple[float, float]] - (image of circle, top left corner)
         """
-        lu_corner = [self.coordinates[0] - self.rad, self.coordinates[1] - self.rad]
-        ru_corner = [self.coordinates[0] + self.rad, self.coordinates[1] - self.rad]
-        rd_corner = [self.coordinates[0] + self.rad, self.coordinates[1] + self.rad]
-        ld_corner = [self.coordinates[0] - self.rad, self.coordinates[1] + self.rad]
-        for hitbox_part in veh.hitbox:
-            if is_in_hitbox_part(lu_corner, hitbox_part):
-                return True
-            if is_in_hitbox_part(ru_corner, hitbox_part):
-                return True
-            if is_in_hitbox_part(rd_corner, hitbox_part):
-                return True
-            if is_in_hitbox_part(ld_corner, hitbox_part):
-                return True
-        return False
+        coordinates = interpolate(self.previous_coordinates, self.coordinates, alpha)
+        return circle_sprite(self.rad, self.color), (coordinates[0] - self.rad, coordinates[1] - self.rad)
 
-    def is_hit_ground(self):
+    def get_draw_box(self, alpha=1):
         """
-        Check if Projectile hit the Ground
-        :return: bool - is Ground hit
+        Request for the rectangle covered by the Projectile
+        :param alpha: float - part of the tick passed since the last tick
+        :return: Pygame Rect object - covered rectangle
         """
-        return self.coordinates[1] - self.rad > SCREEN_HEIGHT - GROUND_HEIGHT / 2
+        return box_rect(interpolate(self.previous_coordinates, self.coordinates, alpha), (2 * self.rad, 2 * self.rad))
 
-    def is_out_of_screen(self):
+    def move(self):
         """
-        Check if Projectile is out of screen (on the x)
-        :return: bool - is Projectile out of screen (on the x)
+        Moving a Projectile within a time unit
         """
-        return self.coordinates[0] < -self.rad or self.coordinates[0] > SCREEN_WIDTH + self.rad
+        self.previous_coordinates[0] = self.coordinates[0]
+        self.previous_coordinates[1] = self.coordinates[1]
+        self.velocity[1] += GRAVITATION
+        self.coordinates[0] += self.velocity[0]
+        self.coordinates[1] += self.velocity[1]
 
     def get_damage(self):
         """
@@ -195,31 +1027,330 @@ class Projectile:
         pass
 
 
+Projectile.pool = ObjectPool(Projectile)
+
+
+class ProjectileStore:
+    """
+    Structure of arrays with every Projectile in the game, that moves and checks all of them at once
+    (Projectile objects stay as views on their rows)
+    """
+
+    def __init__(self, capacity=64):
+        """
+        Initializing a ProjectileStore
+        :param capacity: int - initial number of rows
+        """
+        self.count = 0
+        self.coordinates = np.zeros((capacity, 2))
+        self.previous_coordinates = np.zeros((capacity, 2))
+        self.velocities = np.zeros((capacity, 2))
+        self.rads = np.zeros(capacity)
+        self.damages = np.zeros(capacity, dtype=np.int32)
+        self.kinds = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.objects = [None] * capacity
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.objects[:self.count])
+
+    def get_sprites(self, alpha=1, rows=None):
+        """
+        Request for the images of projectiles and their positions (interpolated for all rows at once)
+        :param alpha: float - part of the tick passed since the last tick
+        :param rows: numpy array[int] - rows of drawn projectiles (every row if not given)
+        :return: list[tuple[Pygame Surface object, tuple[float, float]]] - (image of circle, top left corner)
+        """
+        if rows is None:
+            rows = np.arange(self.count)
+        if len(rows) == 0:
+            return []
+        corners = self.coordinates[rows] - self.rads[rows, None]
+        if alpha < 1:
+            corners += (self.previous_coordinates[rows] - self.coordinates[rows]) * (1 - alpha)
+        objects = self.objects
+        return [(circle_sprite(objects[row].rad, objects[row].color), corner) for row, corner in
+                zip(rows.tolist(), map(tuple, corners.tolist()))]
+
+    def grow(self):
+        """
+        Doubling the number of rows
+        """
+        capacity = len(self.objects)
+        self.coordinates = np.concatenate((self.coordinates, np.zeros((capacity, 2))))
+        self.previous_coordinates = np.concatenate((self.previous_coordinates, np.zeros((capacity, 2))))
+        self.velocities = np.concatenate((self.velocities, np.zeros((capacity, 2))))
+        self.rads = np.concatenate((self.rads, np.zeros(capacity)))
+        self.damages = np.concatenate((self.damages, np.zeros(capacity, dtype=np.int32)))
+        self.kinds = np.concatenate((self.kinds, np.zeros(capacity, dtype=np.int8)))
+        self.alive = np.concatenate((self.alive, np.zeros(capacity, dtype=bool)))
+        self.objects = self.objects + [None] * capacity
+
+    def add(self, projectile):
+        """
+        Adding a Projectile to the first free row and making it a view on that row
+        :param projectile: Projectile object - added Projectile
+        """
+        if self.count == len(self.objects):
+            self.grow()
+        row = self.count
+        self.coordinates[row] = projectile.coordinates
+        self.previous_coordinates[row] = projectile.previous_coordinates
+        self.velocities[row] = projectile.velocity
+        self.rads[row] = projectile.rad
+        self.damages[row] = projectile.damage
+        self.kinds[row] = projectile.kind
+        self.alive[row] = True
+        self.objects[row] = projectile
+        projectile.store = self
+        projectile.row = row
+        self.count += 1
+
+    def extend(self, projectiles):
+        """
+        Adding several projectiles
+        :param projectiles: list[Projectile object] - added projectiles
+        """
+        for projectile in projectiles:
+            self.add(projectile)
+
+    def move(self, gravitation):
+        """
+        Moving every Projectile within a time unit
+        :param gravitation: float - increase of the y velocity within a time unit
+        """
+        n = self.count
+        self.previous_coordinates[:n] = self.coordinates[:n]
+        self.velocities[:n, 1] += gravitation
+        self.coordinates[:n] += self.velocities[:n]
+
+    def hit_ground_mask(self):
+        """
+        Check which projectiles hit the Ground
+        :return: numpy array[bool] - is Ground hit (for every row)
+        """
+        n = self.count
+        return self.coordinates[:n, 1] - self.rads[:n] > SCREEN_HEIGHT - GROUND_HEIGHT / 2
+
+    def out_of_screen_mask(self):
+        """
+        Check which projectiles are out of screen on the x or above the screen and fall back beyond its sides (the
+        moment of return to the top edge is predicted from the parabola)
+        :return: numpy array[bool] - will Projectile never be seen again (for every row)
+        """
+        n = self.count
+        x = self.coordinates[:n, 0]
+        y = self.coordinates[:n, 1]
+        rads = self.rads[:n]
+        out = (x < -rads) | (x > SCREEN_WIDTH + rads)
+        above = y < -rads
+        if above.any():
+            velocity_x = self.velocities[:n, 0][above]
+            velocity_y = self.velocities[:n, 1][above]
+            return_time = (-velocity_y + np.sqrt(velocity_y ** 2 + 2 * GRAVITATION * (-rads[above] - y[above]))) / \
+                GRAVITATION
+            return_x = x[above] + velocity_x * return_time
+            out[above] |= ((return_x < -rads[above] - np.abs(velocity_x)) |
+                           (return_x > SCREEN_WIDTH + rads[above] + np.abs(velocity_x)))
+        return out
+
+    def visible_rows(self):
+        """
+        Request for the rows of projectiles that can be seen on the screen
+        :return: numpy array[int] - rows of visible projectiles
+        """
+        n = self.count
+        margin = self.rads[:n] + CULL_MARGIN
+        x = self.coordinates[:n, 0]
+        y = self.coordinates[:n, 1]
+        return np.flatnonzero((x > -margin) & (x < SCREEN_WIDTH + margin) &
+                              (y > -margin) & (y < SCREEN_HEIGHT + margin))
+
+    def kind_mask(self, kinds):
+        """
+        Check which projectiles are of the given kinds
+        :param kinds: list[int] - kind codes (KIND_SHELL, KIND_SHRAPNEL, KIND_BOMB)
+        :return: numpy array[bool] - is Projectile of one of the kinds (for every row)
+        """
+        kinds_column = self.kinds[:self.count]
+        mask = np.zeros(self.count, dtype=bool)
+        for kind in kinds:
+            mask |= kinds_column == kind
+        return mask
+
+    def vehicle_hits(self, vehicles_grid):
+        """
+        Searching for projectiles that hit vehicles during the last time unit: every Projectile is swept from its
+        previous to its current position, the sweeps are grouped by cells of the grid they overlap, and every group
+        is checked at once against every Vehicle stored in its cell. Only the earliest hit of every Projectile counts
+        :param vehicles_grid: SpatialHash object - grid with vehicles
+        :return: list[tuple[int, Vehicle object, float]] - (row of Projectile, hit Vehicle, time of impact from 0 to 1)
+        """
+        n = self.count
+        if n == 0 or not vehicles_grid.cells:
+            return []
+        cell_size = vehicles_grid.cell_size
+        start_x = self.previous_coordinates[:n, 0]
+        start_y = self.previous_coordinates[:n, 1]
+        first_x = np.floor_divide(np.minimum(start_x, self.coordinates[:n, 0]), cell_size).astype(np.int64)
+        first_y = np.floor_divide(np.minimum(start_y, self.coordinates[:n, 1]), cell_size).astype(np.int64)
+        spans_x = np.floor_divide(np.maximum(start_x, self.coordinates[:n, 0]), cell_size).astype(np.int64) - first_x
+        spans_y = np.floor_divide(np.maximum(start_y, self.coordinates[:n, 1]), cell_size).astype(np.int64) - first_y
+        all_rows = np.arange(n)
+        rows_parts, cells_x_parts, cells_y_parts = [], [], []
+        for step_x in range(int(spans_x.max()) + 1):
+            for step_y in range(int(spans_y.max()) + 1):
+                selected = (spans_x >= step_x) & (spans_y >= step_y)
+                rows_parts.append(all_rows[selected])
+                cells_x_parts.append(first_x[selected] + step_x)
+                cells_y_parts.append(first_y[selected] + step_y)
+        pair_rows = np.concatenate(rows_parts)
+        cells_x = np.concatenate(cells_x_parts)
+        cells_y = np.concatenate(cells_y_parts)
+
+        order = np.lexsort((cells_y, cells_x))
+        sorted_x = cells_x[order]
+        sorted_y = cells_y[order]
+        starts = np.flatnonzero(np.concatenate(([True], (sorted_x[1:] != sorted_x[:-1]) |
+                                                (sorted_y[1:] != sorted_y[:-1]))))
+        ends = np.append(starts[1:], len(order))
+        vehicles_list = []
+        vehicle_indexes = {}
+        candidate_rows, candidate_vehicles, candidate_lengths = [], [], []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            vehicles = vehicles_grid.cells.get((int(sorted_x[start]), int(sorted_y[start])))
+            if vehicles is None:
+                continue
+            rows = pair_rows[order[start:end]]
+            for veh in vehicles:
+                index = vehicle_indexes.get(id(veh))
+                if index is None:
+                    index = vehicle_indexes[id(veh)] = len(vehicles_list)
+                    vehicles_list.append(veh)
+                candidate_rows.append(rows)
+                candidate_vehicles.append(index)
+                candidate_lengths.append(len(rows))
+        if not candidate_rows:
+            return []
+
+        candidate_rows = np.concatenate(candidate_rows)
+        candidate_vehicles = np.repeat(candidate_vehicles, candidate_lengths)
+        boxes = np.array([veh.get_aabb() for veh in vehicles_list])[candidate_vehicles]
+        rads = self.rads[candidate_rows]
+        start_x = start_x[candidate_rows]
+        start_y = start_y[candidate_rows]
+        end_x = self.coordinates[candidate_rows, 0]
+        end_y = self.coordinates[candidate_rows, 1]
+        near = ((np.maximum(start_x, end_x) + rads > boxes[:, 0]) & (np.minimum(start_x, end_x) - rads < boxes[:, 2]) &
+                (np.maximum(start_y, end_y) + rads > boxes[:, 1]) & (np.minimum(start_y, end_y) - rads < boxes[:, 3]))
+        if not near.any():
+            return []
+        pairs = np.unique(candidate_vehicles[near] * n + candidate_rows[near])
+        pair_vehicles = pairs // n
+        pair_rows = pairs % n
+        starts = np.flatnonzero(np.concatenate(([True], pair_vehicles[1:] != pair_vehicles[:-1])))
+        ends = np.append(starts[1:], len(pairs))
+
+        hit_rows, hit_times, hit_vehicles = [], [], []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            veh = vehicles_list[int(pair_vehicles[start])]
+            rows = pair_rows[start:end]
+            x0 = self.previous_coordinates[rows, 0]
+            y0 = self.previous_coordinates[rows, 1]
+            times = veh.sweep_times(x0, y0, self.coordinates[rows, 0] - x0, self.coordinates[rows, 1] - y0,
+                                    self.rads[rows])
+            hit = np.isfinite(times)
+            if hit.any():
+                hit_rows.append(rows[hit])
+                hit_times.append(times[hit])
+                hit_vehicles.append(pair_vehicles[start:end][hit])
+        if not hit_rows:
+            return []
+        hit_rows = np.concatenate(hit_rows)
+        hit_times = np.concatenate(hit_times)
+        hit_vehicles = np.concatenate(hit_vehicles)
+        order = np.lexsort((hit_vehicles, hit_times, hit_rows))
+        first = np.concatenate(([True], hit_rows[order][1:] != hit_rows[order][:-1]))
+        earliest = order[first]
+        return [(row, vehicles_list[veh], time_of_impact) for row, veh, time_of_impact in
+                zip(hit_rows[earliest].tolist(), hit_vehicles[earliest].tolist(), hit_times[earliest].tolist())]
+
+    def remove(self, row):
+        """
+        Marking the row as dead (it is removed from the store during the next compaction)
+        :param row: int - row of Projectile
+        """
+        self.alive[row] = False
+
+    def remove_mask(self, mask):
+        """
+        Marking several rows as dead
+        :param mask: numpy array[bool] - is row dead (for every row)
+        """
+        self.alive[:self.count] &= ~mask
+
+    def compact(self):
+        """
+        Removing dead rows by moving the last alive rows into their places
+        :return: list[Projectile object] - removed projectiles
+        """
+        removed = []
+        dead_rows = np.flatnonzero(~self.alive[:self.count]).tolist()
+        for row in reversed(dead_rows):
+            projectile = self.objects[row]
+            projectile.own_coordinates = self.coordinates[row].tolist()
+            projectile.own_previous_coordinates = self.previous_coordinates[row].tolist()
+            projectile.own_velocity = self.velocities[row].tolist()
+            projectile.store = None
+            removed.append(projectile)
+            last = self.count - 1
+            if row != last:
+                self.coordinates[row] = self.coordinates[last]
+                self.previous_coordinates[row] = self.previous_coordinates[last]
+                self.velocities[row] = self.velocities[last]
+                self.rads[row] = self.rads[last]
+                self.damages[row] = self.damages[last]
+                self.kinds[row] = self.kinds[last]
+                self.alive[row] = True
+                self.objects[row] = self.objects[last]
+                self.objects[row].row = row
+            self.alive[last] = False
+            self.objects[last] = None
+            self.count -= 1
+        return removed
+
+
 class Shell(Projectile):
     """
     Projectile fired from a tank gun in artillery mod
     """
 
-    def __init__(self, surface, coordinates, velocity):
+    __slots__ = ()
+
+    def reset(self, surface, coordinates, velocity):
         """
-        Initializing a Shell
+        Setting a Shell to its initial state (when it is created or taken from the pool)
         :param surface: Pygame Surface object - target surface
         :param coordinates: list[float, float] - [x coordinate of center, y coordinates of center]
         :param velocity: list[float, float] - [x velocity, y velocity]
         """
-        super().__init__(surface, coordinates, velocity)
+        super().reset(surface, coordinates, velocity)
         self.rad = 8
         self.damage = 3
+        self.kind = KIND_SHELL
 
     def death(self):
         """
         Processing death effects of the Shell
         :return: Particle object - image of the explosion
         """
-        return Particle(self.surface,
-                        (self.rad * 5, self.rad * 5),
-                        (self.coordinates[0], SCREEN_HEIGHT - (GROUND_HEIGHT / 2 + 2.5 * self.rad)),
-                        "textures/land_explosion.png")
+        return Particle.acquire(self.surface,
+                                (self.rad * 5, self.rad * 5),
+                                (self.coordinates[0], SCREEN_HEIGHT - (GROUND_HEIGHT / 2 + 2.5 * self.rad)),
+                                "land_explosion")
 
     def get_type(self):
         """
@@ -229,21 +1360,27 @@ class Shell(Projectile):
         return "Shell"
 
 
+Shell.pool = ObjectPool(Shell)
+
+
 class Shrapnel(Projectile):
     """
     Projectile fired in the amount of 5 pieces from a tank gun in shotgun mod
     """
 
-    def __init__(self, surface, coordinates, velocity):
+    __slots__ = ()
+
+    def reset(self, surface, coordinates, velocity):
         """
-        Initializing a Shrapnel
+        Setting a Shrapnel to its initial state (when it is created or taken from the pool)
         :param surface: Pygame Surface object - target surface
         :param coordinates: list[float, float] - [x coordinate of center, y coordinates of center]
         :param velocity: list[float, float] - [x velocity, y velocity]
         """
-        super().__init__(surface, coordinates, velocity)
+        super().reset(surface, coordinates, velocity)
         self.rad = 3
         self.damage = 1
+        self.kind = KIND_SHRAPNEL
 
     def get_type(self):
         """
@@ -253,32 +1390,38 @@ class Shrapnel(Projectile):
         return "Shrapnel"
 
 
+Shrapnel.pool = ObjectPool(Shrapnel)
+
+
 class Bomb(Projectile):
     """
     Projectile dropped from an airship
     """
 
-    def __init__(self, surface, coordinates, velocity):
+    __slots__ = ()
+
+    def reset(self, surface, coordinates, velocity):
         """
-        Initializing a Bomb
+        Setting a Bomb to its initial state (when it is created or taken from the pool)
         :param surface: Pygame Surface object - target surface
         :param coordinates: list[float, float] - [x coordinate of center, y coordinates of center]
         :param velocity: list[float, float] - [x velocity, y velocity]
         """
-        super().__init__(surface, coordinates, velocity)
+        super().reset(surface, coordinates, velocity)
         self.rad = 10
         self.color = RED
         self.damage = 5
+        self.kind = KIND_BOMB
 
     def death(self):
         """
         Processing death effects of the Bomb
         :return: Particle object - image of the explosion
         """
-        return Particle(self.surface,
-                        (self.rad * 8, self.rad * 8),
-                        (self.coordinates[0], SCREEN_HEIGHT - (GROUND_HEIGHT / 2 + 4 * self.rad)),
-                        "textures/land_explosion.png")
+        return Particle.acquire(self.surface,
+                                (self.rad * 8, self.rad * 8),
+                                (self.coordinates[0], SCREEN_HEIGHT - (GROUND_HEIGHT / 2 + 4 * self.rad)),
+                                "land_explosion")
 
     def get_type(self):
         """
@@ -288,48 +1431,201 @@ class Bomb(Projectile):
         return "Bomb"
 
 
+Bomb.pool = ObjectPool(Bomb)
+
+
+def hitbox_bounds(hitbox_offsets):
+    """
+    Request for the bounding box of the hitbox relative to the center of vehicle
+    :param hitbox_offsets: numpy array[N x 4] - [x offset of center, y offset of center,
+                                                distance to the edge on x, distance to the edge on y] for every part
+    :return: tuple[4 x float] - (left edge, top edge, right edge, bottom edge)
+    """
+    if len(hitbox_offsets) == 0:
+        return (0.0, 0.0, 0.0, 0.0)
+    return (float((hitbox_offsets[:, 0] - hitbox_offsets[:, 2]).min()),
+            float((hitbox_offsets[:, 1] - hitbox_offsets[:, 3]).min()),
+            float((hitbox_offsets[:, 0] + hitbox_offsets[:, 2]).max()),
+            float((hitbox_offsets[:, 1] + hitbox_offsets[:, 3]).max()))
+
+
 class Vehicle:
     """
     Abstract class of vehicle, that can move, interact with environment and sometimes be controlled by player
     """
 
+    HITBOX_OFFSETS = np.zeros((0, 4))
+    HITBOX_BOUNDS = hitbox_bounds(HITBOX_OFFSETS)
+    PRECISE_COLLISION = False
+    BOMB_RATE = 0
+    HIT_POINTS = 0
+    EXP_POINTS = 0
+    SIZE = (0, 0)
+
     def __init__(self, surface):
         """
         Initializing a Vehicle
         :param surface: Pygame Surface object - target surface
         """
         self.surface = surface
-        self.exp_points = 0
-        self.hit_points = 0
-        self.size = []
+        self.exp_points = self.EXP_POINTS
+        self.hit_points = self.HIT_POINTS
+        self.size = list(self.SIZE)
         self.coordinates = []
+        self.previous_coordinates = None
         self.velocity = []
-        self.hitbox = []
-        self.texture = pg.transform.scale(pg.image.load("textures/default.png"), (10, 10))
+        self.hitbox_coordinates = None
+        self.world_hitbox = None
+        self.grid_cells = None
+        self.texture_name = "default"
+        self.texture_flip = False
+        self.texture = TEXTURES.get("default", (10, 10))
+        self.last_hit_by = -1
 
-    def update_hitbox(self):
+    @property
+    def hitbox(self):
         """
-        Updating hitbox of Vehicle after one time unit
+        Request for the hitbox in screen coordinates (it is computed again only after the Vehicle has moved)
+        :return: numpy array[N x 4] - [x coordinate of center, y coordinates of center,
+                                       distance to the edge on x, distance to the edge on y] for every part
         """
-        pass
+        x = self.coordinates[0]
+        y = self.coordinates[1]
+        if self.hitbox_coordinates is None or self.hitbox_coordinates[0] != x or self.hitbox_coordinates[1] != y:
+            self.world_hitbox = self.HITBOX_OFFSETS + (x, y, 0, 0)
+            self.hitbox_coordinates = (x, y)
+        return self.world_hitbox
 
-    def draw(self):
+    def draw(self, alpha=1):
         """
         Drawing a Vehicle
+        :param alpha: float - part of the tick passed since the last tick
+        """
+        self.surface.blit(*self.get_sprite(alpha))
+
+    def get_sprite(self, alpha=1):
+        """
+        Request for the image of the Vehicle and its position
+        :param alpha: float - part of the tick passed since the last tick
+        :return: tuple[Pygame Surface object, tuple[float, float]] - (texture, top left corner)
         """
-        draw_box = (self.coordinates[0] - self.size[0] / 2,
-                    self.coordinates[1] - self.size[1] / 2,
-                    self.size[0],
-                    self.size[1])
-        self.surface.blit(self.texture, draw_box)
+        coordinates = interpolate(self.previous_coordinates, self.coordinates, alpha)
+        return self.texture, (coordinates[0] - self.size[0] / 2, coordinates[1] - self.size[1] / 2)
+
+    def get_draw_box(self, alpha=1):
+        """
+        Request for the rectangle covered by the Vehicle
+        :param alpha: float - part of the tick passed since the last tick
+        :return: Pygame Rect object - covered rectangle
+        """
+        return box_rect(interpolate(self.previous_coordinates, self.coordinates, alpha), self.size)
 
     def move(self):
         """
         Moving a Vehicle within a time unit
+        :return: bool - has Vehicle moved
         """
-        self.update_hitbox()
+        if self.velocity[0] == 0 and self.velocity[1] == 0:
+            self.previous_coordinates = self.coordinates
+            return False
+        self.previous_coordinates = [self.coordinates[0], self.coordinates[1]]
         self.coordinates[0] += self.velocity[0]
         self.coordinates[1] += self.velocity[1]
+        return True
+
+    def get_aabb(self):
+        """
+        Request for the bounding box of the hitbox
+        :return: tuple[4 x float] - (left edge, top edge, right edge, bottom edge)
+        """
+        if self.PRECISE_COLLISION:
+            return (self.coordinates[0] - self.size[0] / 2, self.coordinates[1] - self.size[1] / 2,
+                    self.coordinates[0] + self.size[0] / 2, self.coordinates[1] + self.size[1] / 2)
+        left, top, right, bottom = self.HITBOX_BOUNDS
+        return (self.coordinates[0] + left, self.coordinates[1] + top,
+                self.coordinates[0] + right, self.coordinates[1] + bottom)
+
+    def is_visible(self):
+        """
+        Check if the Vehicle can be seen on the screen
+        :return: bool - does the texture overlap the screen
+        """
+        return is_visible(self.coordinates, self.size)
+
+    def is_out_of_world(self):
+        """
+        Check if the Vehicle has left the world (the screen extended by WORLD_MARGIN on every side)
+        :return: bool - is the hitbox bounding box entirely outside the world
+        """
+        left, top, right, bottom = self.get_aabb()
+        return (right < -WORLD_MARGIN or left > SCREEN_WIDTH + WORLD_MARGIN or
+                bottom < -WORLD_MARGIN or top > SCREEN_HEIGHT + WORLD_MARGIN)
+
+    def sweep_times(self, x0, y0, dx, dy, rads):
+        """
+        Searching for the earliest moments, when projectiles moving along segments touch the Vehicle: segments are
+        checked against boxes (hitbox parts or the texture box) extended by radius of projectile, and, if
+        PRECISE_COLLISION is set for the type of Vehicle, the pixel mask grown by radius of projectile is checked
+        against the segment of the center with one overlap of masks (the first touching pixel is searched only after
+        a hit)
+        :param x0: numpy array[float] - x coordinates of segment starts
+        :param y0: numpy array[float] - y coordinates of segment starts
+        :param dx: numpy array[float] - displacements on the x
+        :param dy: numpy array[float] - displacements on the y
+        :param rads: numpy array[float] - radiuses of projectiles
+        :return: numpy array[float] - time of impact from 0 (segment start) to 1 (segment end), inf if there is none
+        """
+        if self.PRECISE_COLLISION:
+            boxes = np.array([[self.coordinates[0], self.coordinates[1], self.size[0] / 2, self.size[1] / 2]])
+        else:
+            boxes = self.hitbox
+        enter = 0
+        leave = 1
+        for start, displacement, center, half_size in ((x0, dx, boxes[:, 0], boxes[:, 2]),
+                                                       (y0, dy, boxes[:, 1], boxes[:, 3])):
+            # Zero displacement becomes a tiny one, so a start between the edges gives huge times of opposite signs
+            displacement = np.where(displacement == 0, 1e-12, displacement)[:, None]
+            offset = center - start[:, None]
+            reach = half_size + rads[:, None]
+            low_time = (offset - reach) / displacement
+            high_time = (offset + reach) / displacement
+            enter = np.maximum(enter, np.minimum(low_time, high_time))
+            leave = np.minimum(leave, np.maximum(low_time, high_time))
+        times = np.where(enter < leave, enter, np.inf).min(axis=1)
+        if not self.PRECISE_COLLISION:
+            return times
+        left = self.coordinates[0] - self.size[0] / 2
+        top = self.coordinates[1] - self.size[1] / 2
+        rows = np.flatnonzero(np.isfinite(times))
+        if len(rows) == 0:
+            return times
+        # The center moves along its segment in the mask grown by radius, so one overlap tells if it touches
+        row_rads = rads[rows].astype(int)
+        segments_x = np.round(dx[rows]).astype(int)
+        segments_y = np.round(dy[rows]).astype(int)
+        starts_x = np.floor(x0[rows] - row_rads - left).astype(int) + 2 * row_rads - 1
+        starts_y = np.floor(y0[rows] - row_rads - top).astype(int) + 2 * row_rads - 1
+        masks = {}
+        for index, rad, segment_x, segment_y, start_x, start_y, enter in zip(
+                rows.tolist(), row_rads.tolist(), segments_x.tolist(), segments_y.tolist(), starts_x.tolist(),
+                starts_y.tolist(), times[rows].tolist()):
+            mask = masks.get(rad)
+            if mask is None:
+                mask = masks[rad] = TEXTURES.get_mask(self.texture_name, self.size, self.texture_flip, rad)
+            times[index] = math.inf
+            if mask.overlap(line_mask(segment_x, segment_y),
+                            (start_x + min(segment_x, 0), start_y + min(segment_y, 0))) is None:
+                continue
+            width, height = mask.get_size()
+            steps = segment_steps(segment_x, segment_y)
+            first = max(0, math.floor(enter * steps) - 1)
+            for step, (x, y) in enumerate(segment_pixels(segment_x, segment_y, first), first):
+                x += start_x
+                y += start_y
+                if 0 <= x < width and 0 <= y < height and mask.get_at((x, y)):
+                    times[index] = step / steps
+                    break
+        return times
 
     def take_damage(self, damage):
         """
@@ -344,7 +1640,7 @@ class Vehicle:
         :return: Particle object - image of the explosion
         :return: int - experience points from killing the Vehicle
         """
-        explosion_particle = Particle(self.surface, self.size, self.coordinates, "textures/air_explosion.png")
+        explosion_particle = Particle.acquire(self.surface, self.size, self.coordinates, "air_explosion")
         return explosion_particle, self.exp_points
 
     def is_dead(self):
@@ -366,33 +1662,31 @@ class Tank(Vehicle):
     Vehicle controlled by player, that can move and carries a gun
     """
 
-    def __init__(self, surface, spawn_point, control_buttons):
+    HITBOX_OFFSETS = np.array([[0, 21, 50, 9],
+                               [0, 4, 36, 7],
+                               [0, -17, 25, 13]], dtype=float)
+    HITBOX_BOUNDS = hitbox_bounds(HITBOX_OFFSETS)
+    HIT_POINTS = 10
+    EXP_POINTS = 10
+    SIZE = (100, 60)
+    SPEED = 5
+
+    def __init__(self, surface, spawn_point, control_buttons, score_index=0):
         """
         Initializing a Tank
         :param surface: Pygame Surface object - target surface
         :param spawn_point: float - x coordinate of spawn point
         :param control_buttons: ControlButtons object - buttons to move left and right
+        :param score_index: int - index of the Tank in the score list (it stays when other tanks are removed)
         """
         super().__init__(surface)
-        self.exp_points = 10
-        self.hit_points = 10
-        self.size = [100, 60]
         self.coordinates = [spawn_point, SCREEN_HEIGHT - (GROUND_HEIGHT / 2 + 30)]
         self.velocity = [0, 0]
-        self.hitbox = [[self.coordinates[0], self.coordinates[1] + 21, self.size[0] / 2, 9],
-                       [self.coordinates[0], self.coordinates[1] + 4, 36, 7],
-                       [self.coordinates[0], self.coordinates[1] - 17, 25, 13]]
-        self.texture = pg.transform.scale(pg.image.load("textures/tank.png"), (self.size[0], self.size[1]))
+        self.texture_name = "tank"
+        self.texture = TEXTURES.get("tank", self.size)
         self.control_buttons = control_buttons
         self.score = 0
-
-    def update_hitbox(self):
-        """
-        Updating hitbox of Tank after one time unit
-        """
-        self.hitbox = [[self.coordinates[0], self.coordinates[1] + 21, self.size[0] / 2, 9],
-                       [self.coordinates[0], self.coordinates[1] + 4, 36, 7],
-                       [self.coordinates[0], self.coordinates[1] - 17, 25, 13]]
+        self.score_index = score_index
 
     def control(self, event):
         """
@@ -401,9 +1695,9 @@ class Tank(Vehicle):
         """
         if event.type == pg.KEYDOWN:
             if event.key == self.control_buttons.to_right:
-                self.velocity[0] = 5
+                self.velocity[0] = self.SPEED
             if event.key == self.control_buttons.to_left:
-                self.velocity[0] = -5
+                self.velocity[0] = -self.SPEED
         if event.type == pg.KEYUP:
             if event.key == self.control_buttons.to_right or event.key == self.control_buttons.to_left:
                 self.velocity[0] = 0
@@ -414,10 +1708,10 @@ class Tank(Vehicle):
         :return: Particle object - image of the explosion
         :return: int - experience points from killing the Vehicle
         """
-        explosion_particle = Particle(self.surface,
-                                      [self.size[0] * 2, self.size[1] * 4],
-                                      [self.coordinates[0], self.coordinates[1] - 1.5 * self.size[1]],
-                                      "textures/land_explosion.png")
+        explosion_particle = Particle.acquire(self.surface,
+                                              [self.size[0] * 2, self.size[1] * 4],
+                                              [self.coordinates[0], self.coordinates[1] - 1.5 * self.size[1]],
+                                              "land_explosion")
         return explosion_particle, self.exp_points
 
     def get_type(self):
@@ -433,32 +1727,27 @@ class AirBalloon(Vehicle):
     Air balloon - simple base target
     """
 
-    def __init__(self, surface):
+    HITBOX_OFFSETS = np.array([[0, 44, 8, 16],
+                               [0, 15, 39, 13],
+                               [0, -19, 45, 21],
+                               [0, -50, 38, 10]], dtype=float)
+    HITBOX_BOUNDS = hitbox_bounds(HITBOX_OFFSETS)
+    HIT_POINTS = 1
+    EXP_POINTS = 1
+    SIZE = (90, 120)
+
+    def __init__(self, surface, rng=rand):
         """
         Initializing an AirBalloon
         :param surface: Pygame Surface object - target surface
+        :param rng: Random object - source of random numbers (global random module if not given)
         """
         super().__init__(surface)
-        self.exp_points = 1
-        self.hit_points = 1
-        self.size = [90, 120]
-        self.coordinates = [rand.randint(self.size[0], SCREEN_WIDTH - self.size[0]),
-                            rand.randint(self.size[1], SCREEN_HEIGHT - GROUND_HEIGHT - self.size[1])]
+        self.coordinates = [rng.randint(self.size[0], SCREEN_WIDTH - self.size[0]),
+                            rng.randint(self.size[1], SCREEN_HEIGHT - GROUND_HEIGHT - self.size[1])]
         self.velocity = [0, 0]
-        self.hitbox = [[self.coordinates[0], self.coordinates[1] + 44, 8, 16],
-                       [self.coordinates[0], self.coordinates[1] + 15, 39, 13],
-                       [self.coordinates[0], self.coordinates[1] - 19, self.size[0] / 2, 21],
-                       [self.coordinates[0], self.coordinates[1] - 50, 38, 10]]
-        self.texture = pg.transform.scale(pg.image.load("textures/air_balloon.png"), (self.size[0], self.size[1]))
-
-    def update_hitbox(self):
-        """
-        Updating hitbox of AirBalloon after one time unit
-        """
-        self.hitbox = [[self.coordinates[0], self.coordinates[1] + 44, 8, 16],
-                       [self.coordinates[0], self.coordinates[1] + 15, 39, 13],
-                       [self.coordinates[0], self.coordinates[1] - 19, self.size[0] / 2, 21],
-                       [self.coordinates[0], self.coordinates[1] - 50, 38, 10]]
+        self.texture_name = "air_balloon"
+        self.texture = TEXTURES.get("air_balloon", self.size)
 
     def get_type(self):
         """
@@ -473,48 +1762,45 @@ class Airship(Vehicle):
     Airship - moving target that can drop bombs
     """
 
-    def __init__(self, surface):
-        """
-        Initializing an AirBalloon
+    HITBOX_OFFSETS = np.array([[-125, -14, 24, 62],
+                               [-50, 0, 51, 56],
+                               [42, 0, 40, 80],
+                               [114, 0, 36, 10]], dtype=float)
+    HITBOX_BOUNDS = hitbox_bounds(HITBOX_OFFSETS)
+    BOMB_RATE = 1 / 5
+    HIT_POINTS = 4
+    EXP_POINTS = 3
+    SIZE = (300, 160)
+    SPEEDS = (1, 5)
+    BOMB_OFFSET = (35, 91)
+
+    def __init__(self, surface, rng=rand):
+        """
+        Initializing an Airship
         :param surface: Pygame Surface object - target surface
+        :param rng: Random object - source of random numbers (global random module if not given)
         """
         super().__init__(surface)
-        self.exp_points = 3
-        self.hit_points = 4
-        self.size = [300, 160]
-        self.direction = rand.randint(0, 1)
+        self.direction = rng.randint(0, 1)
         if self.direction == 0:
             self.coordinates = [SCREEN_WIDTH * self.direction - self.size[0],
-                                rand.randint(self.size[1], SCREEN_HEIGHT - GROUND_HEIGHT - self.size[1])]
-            self.velocity = [rand.randint(1, 5), 0]
+                                rng.randint(self.size[1], SCREEN_HEIGHT - GROUND_HEIGHT - self.size[1])]
+            self.velocity = [rng.randint(self.SPEEDS[0], self.SPEEDS[1]), 0]
         else:
             self.coordinates = [SCREEN_WIDTH * self.direction + self.size[0],
-                                rand.randint(self.size[1], SCREEN_HEIGHT - GROUND_HEIGHT - self.size[1])]
-            self.velocity = [rand.randint(-5, -1), 0]
-        self.hitbox = [[self.coordinates[0] - 125, self.coordinates[1] - 14, 24, 62],
-                       [self.coordinates[0] - 50, self.coordinates[1], 51, 56],
-                       [self.coordinates[0] + 42, self.coordinates[1], 40, self.size[1] / 2],
-                       [self.coordinates[0] + 114, self.coordinates[1], 36, 10]]
-        self.texture = pg.transform.flip(
-            pg.transform.scale(pg.image.load("textures/airship.png"), (self.size[0], self.size[1])),
-            bool(self.direction),
-            False)
-
-    def update_hitbox(self):
-        """
-        Updating hitbox of Airship after one time unit
-        """
-        self.hitbox = [[self.coordinates[0] - 125, self.coordinates[1] - 14, 24, 62],
-                       [self.coordinates[0] - 50, self.coordinates[1], 51, 56],
-                       [self.coordinates[0] + 42, self.coordinates[1], 40, self.size[1] / 2],
-                       [self.coordinates[0] + 114, self.coordinates[1], 36, 10]]
+                                rng.randint(self.size[1], SCREEN_HEIGHT - GROUND_HEIGHT - self.size[1])]
+            self.velocity = [rng.randint(-self.SPEEDS[1], -self.SPEEDS[0]), 0]
+        self.texture_name = "airship"
+        self.texture_flip = bool(self.direction)
+        self.texture = TEXTURES.get("airship", self.size, self.texture_flip)
 
     def drop_bomb(self):
         """
         Spawning Bomb under the Airship cockpit
         :return: Bomb object - new Bomb
         """
-        return Bomb(self.surface, [self.coordinates[0] + 35, self.coordinates[1] + 91], [0, 0])
+        return Bomb.acquire(self.surface, [self.coordinates[0] + self.BOMB_OFFSET[0],
+                                           self.coordinates[1] + self.BOMB_OFFSET[1]], [0, 0])
 
     def get_type(self):
         """
@@ -524,6 +1810,49 @@ class Airship(Vehicle):
         return "Airship"
 
 
+class GunSprites:
+    """
+    Pre-rendered images of guns with their aims for quantized angles and fire powers, the least recently used
+    images are dropped when there are more than max_sprites of them
+    """
+
+    def __init__(self, max_sprites=1024):
+        """
+        Initializing a GunSprites
+        :param max_sprites: int - maximum number of stored images
+        """
+        self.max_sprites = max_sprites
+        self.sprites = OrderedDict()
+
+    def get(self, key, polygons):
+        """
+        Request for the image of polygons (it is drawn only if there is no image with the key yet)
+        :param key: tuple - (type of gun, angle bucket, fire power, ...) - key of image
+        :param polygons: function - returns list[tuple[color, list[tuple[float, float]]]] - polygons with vertices
+                         relative to the chamber, drawn in the given order
+        :return: tuple[Pygame Surface object, tuple[int, int]] - (image, top left corner relative to the chamber)
+        """
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+        polygons = polygons()
+        rect = points_rect([point for _, points in polygons for point in points])
+        image = pg.Surface(rect.size, pg.SRCALPHA)
+        for color, points in polygons:
+            pg.draw.polygon(image, color, [(point[0] - rect.left, point[1] - rect.top) for point in points])
+        if pg.display.get_surface() is not None:
+            image = image.convert_alpha()
+        sprite = (image, rect.topleft)
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.max_sprites:
+            self.sprites.popitem(last=False)
+        return sprite
+
+
+GUN_SPRITES = GunSprites()
+
+
 class Gun:
     """
     Abstract class of gun, that can shoot and move together with any vehicle
@@ -538,6 +1867,7 @@ class Gun:
         self.length = 4
         self.surface = surface
         self.coordinates = [coordinates[0], coordinates[1] - 15]
+        self.previous_coordinates = None
         self.fire_power = 10
         self.fire_on = 0
         self.angle = 1
@@ -548,6 +1878,7 @@ class Gun:
         Moving Gun together with its vehicle
         :param new_coordinates: list[float, float] - [x coordinate of chamber, y coordinates of chamber]
         """
+        self.previous_coordinates = self.coordinates
         self.coordinates = [new_coordinates[0], new_coordinates[1]]
 
     def fire_start(self, event):
@@ -567,41 +1898,97 @@ class Gun:
 
     def targetting(self, event):
         """
-        Aiming towards the cursor
+        Aiming towards the cursor (the angle is rounded to the angle bucket, the Gun never aims below the horizon)
         :param event: Pygame event - any event from queue
         """
-        pi = math.pi
         if event.type == pg.MOUSEMOTION:
-            if event.pos[0] - self.coordinates[0] == 0:
-                self.angle = -pi / 2
-            elif event.pos[1] - self.coordinates[1] > 0:
-                if event.pos[0] - self.coordinates[0] > 0:
-                    self.angle = 0
-                else:
-                    self.angle = pi
-            elif event.pos[1] - self.coordinates[1] < 0 and event.pos[0] - self.coordinates[0] > 0:
-                self.angle = math.atan((event.pos[1] - self.coordinates[1]) / (event.pos[0] - self.coordinates[0]))
+            dx = event.pos[0] - self.coordinates[0]
+            dy = event.pos[1] - self.coordinates[1]
+            if dx == 0:
+                angle = -math.pi / 2
+            elif dy > 0:
+                angle = 0 if dx > 0 else math.pi
             else:
-                self.angle = math.atan((event.pos[1] - self.coordinates[1]) / (event.pos[0] - self.coordinates[0])) + pi
+                angle = math.atan2(dy, dx)
+            self.angle = angle_bucket(angle) * ANGLE_STEP
 
-    def draw(self):
+    def barrel_points(self, bucket):
         """
-        Drawing a Gun
+        Request for the barrel relative to the chamber
+        :param bucket: int - angle bucket
+        :return: tuple[4 x tuple[float, float]] - vertices of barrel polygon
         """
-        x = self.coordinates[0]
-        y = self.coordinates[1]
-        sin = math.sin(self.angle)
-        cos = math.cos(self.angle)
+        sin = SIN_TABLE[bucket]
+        cos = COS_TABLE[bucket]
         length = self.length
         width = self.width
-        pg.draw.polygon(
-            self.surface,
-            self.color,
-            ((x - width / 2 * sin, y + width / 2 * cos),
-             (x + length * 10 * cos - width / 2 * sin, y + length * 10 * sin + width / 2 * cos),
-             (x + length * 10 * cos + width / 2 * sin, y + length * 10 * sin - width / 2 * cos),
-             (x + width / 2 * sin, y - width / 2 * cos))
-        )
+        return ((-width / 2 * sin, width / 2 * cos),
+                (length * 10 * cos - width / 2 * sin, length * 10 * sin + width / 2 * cos),
+                (length * 10 * cos + width / 2 * sin, length * 10 * sin - width / 2 * cos),
+                (width / 2 * sin, -width / 2 * cos))
+
+    def aim_points(self, bucket):
+        """
+        Request for the aim relative to the chamber
+        :param bucket: int - angle bucket
+        :return: tuple[tuple[float, float]] - vertices of aim polygon
+        """
+        return self.barrel_points(bucket)
+
+    def polygons(self, bucket):
+        """
+        Request for the polygons of the image of the Gun
+        :param bucket: int - angle bucket
+        :return: list[tuple[color, tuple[tuple[float, float]]]] - (color, vertices relative to the chamber)
+        """
+        return [(self.color, self.barrel_points(bucket))]
+
+    def barrel_polygon(self, alpha=1):
+        """
+        Request for the barrel
+        :param alpha: float - part of the tick passed since the last tick
+        :return: tuple[4 x tuple[float, float]] - vertices of barrel polygon
+        """
+        x, y = interpolate(self.previous_coordinates, self.coordinates, alpha)
+        return tuple((x + point[0], y + point[1]) for point in self.barrel_points(angle_bucket(self.angle)))
+
+    def aim_polygon(self, alpha=1):
+        """
+        Request for the aim
+        :param alpha: float - part of the tick passed since the last tick
+        :return: tuple[tuple[float, float]] - vertices of aim polygon
+        """
+        x, y = interpolate(self.previous_coordinates, self.coordinates, alpha)
+        return tuple((x + point[0], y + point[1]) for point in self.aim_points(angle_bucket(self.angle)))
+
+    def get_sprite(self, alpha=1):
+        """
+        Request for the pre-rendered image of the Gun with its aim and its position
+        :param alpha: float - part of the tick passed since the last tick
+        :return: tuple[Pygame Surface object, tuple[float, float]] - (image, top left corner)
+        """
+        x, y = interpolate(self.previous_coordinates, self.coordinates, alpha)
+        bucket = angle_bucket(self.angle)
+        image, offset = GUN_SPRITES.get((self.get_type(), self.width, self.length, self.color, bucket,
+                                         self.fire_power), lambda: self.polygons(bucket))
+        return image, (x + offset[0], y + offset[1])
+
+    def draw(self, alpha=1):
+        """
+        Drawing a Gun
+        :param alpha: float - part of the tick passed since the last tick
+        """
+        self.surface.blit(*self.get_sprite(alpha))
+
+    def get_draw_box(self, alpha=1):
+        """
+        Request for the rectangle covered by the Gun and its aim
+        :param alpha: float - part of the tick passed since the last tick
+        :return: Pygame Rect object - covered rectangle
+        """
+        image, position = self.get_sprite(alpha)
+        return pg.Rect(math.floor(position[0]) - 1, math.floor(position[1]) - 1, image.get_width() + 3,
+                       image.get_height() + 3)
 
     def power_up(self):
         """
@@ -629,40 +2016,42 @@ class Artillery(Gun):
         """
         x = self.coordinates[0]
         y = self.coordinates[1]
-        sin = math.sin(self.angle)
-        cos = math.cos(self.angle)
+        bucket = angle_bucket(self.angle)
+        sin = SIN_TABLE[bucket]
+        cos = COS_TABLE[bucket]
         length = self.length
         speed = self.fire_power
         if event.type == pg.MOUSEBUTTONUP:
             start_coordinates = [x + length * 10 * cos, y + length * 10 * sin]
-            new_projectiles = [Shell(self.surface, start_coordinates, [speed * cos, speed * sin])]
+            new_projectiles = [Shell.acquire(self.surface, start_coordinates, [speed * cos, speed * sin])]
             self.fire_on = 0
             self.fire_power = 10
             return new_projectiles
 
     # noinspection DuplicatedCode
-    def draw(self):
+    def aim_points(self, bucket):
         """
-        Drawing artillery gun with narrow-angle aim
+        Request for the narrow-angle aim relative to the chamber
+        :param bucket: int - angle bucket
+        :return: tuple[4 x tuple[float, float]] - vertices of aim polygon
         """
-        x = self.coordinates[0]
-        y = self.coordinates[1]
-        sin = math.sin(self.angle)
-        cos = math.cos(self.angle)
+        sin = SIN_TABLE[bucket]
+        cos = COS_TABLE[bucket]
         length = self.length
         width = self.width
         speed = self.fire_power
-        trans_surface = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pg.SRCALPHA)
-        pg.draw.polygon(
-            trans_surface,
-            RED + (120,),
-            ((x - width / 2 * sin, y + width / 2 * cos),
-             (x + length * speed * cos - width / 2 * sin, y + length * speed * sin + width / 2 * cos),
-             (x + length * speed * cos + width / 2 * sin, y + length * speed * sin - width / 2 * cos),
-             (x + width / 2 * sin, y - width / 2 * cos))
-        )
-        self.surface.blit(trans_surface, (0, 0))
-        super().draw()
+        return ((-width / 2 * sin, width / 2 * cos),
+                (length * speed * cos - width / 2 * sin, length * speed * sin + width / 2 * cos),
+                (length * speed * cos + width / 2 * sin, length * speed * sin - width / 2 * cos),
+                (width / 2 * sin, -width / 2 * cos))
+
+    def polygons(self, bucket):
+        """
+        Request for the polygons of the image of artillery gun with narrow-angle aim
+        :param bucket: int - angle bucket
+        :return: list[tuple[color, tuple[tuple[float, float]]]] - (color, vertices relative to the chamber)
+        """
+        return [(RED + (120,), self.aim_points(bucket))] + super().polygons(bucket)
 
     def get_type(self):
         """
@@ -676,6 +2065,9 @@ class Shotgun(Gun):
     """
     Gun that can fire five small projectiles (Shrapnel) at a time
     """
+
+    SPREAD_BUCKETS = (ANGLE_BUCKETS // 24, ANGLE_BUCKETS // 48, 0, -ANGLE_BUCKETS // 48, -ANGLE_BUCKETS // 24)
+
     def fire_end(self, event):
         """
         Projectile shot towards the cursor
@@ -683,46 +2075,44 @@ class Shotgun(Gun):
         :return: list[Projectiles object] - new projectiles created by shot
         """
         if event.type == pg.MOUSEBUTTONUP:
-            s_x = self.coordinates[0] + self.length * 10 * math.cos(self.angle)
-            s_y = self.coordinates[1] + self.length * 10 * math.sin(self.angle)
+            bucket = angle_bucket(self.angle)
+            s_x = self.coordinates[0] + self.length * 10 * COS_TABLE[bucket]
+            s_y = self.coordinates[1] + self.length * 10 * SIN_TABLE[bucket]
             speed = self.fire_power
-            ang = self.angle
-            pi = math.pi
-            new_projectiles = [
-                Shrapnel(self.surface, [s_x, s_y], [speed * math.cos(ang + pi / 12), speed * math.sin(ang + pi / 12)]),
-                Shrapnel(self.surface, [s_x, s_y], [speed * math.cos(ang + pi / 24), speed * math.sin(ang + pi / 24)]),
-                Shrapnel(self.surface, [s_x, s_y], [speed * math.cos(ang), speed * math.sin(ang)]),
-                Shrapnel(self.surface, [s_x, s_y], [speed * math.cos(ang - pi / 24), speed * math.sin(ang - pi / 24)]),
-                Shrapnel(self.surface, [s_x, s_y], [speed * math.cos(ang - pi / 12), speed * math.sin(ang - pi / 12)])
-            ]
+            new_projectiles = []
+            for spread in self.SPREAD_BUCKETS:
+                spread_bucket = (bucket + spread) % ANGLE_BUCKETS
+                new_projectiles.append(Shrapnel.acquire(self.surface, [s_x, s_y], [speed * COS_TABLE[spread_bucket],
+                                                                                   speed * SIN_TABLE[spread_bucket]]))
             self.fire_on = 0
             self.fire_power = 10
             return new_projectiles
 
     # noinspection DuplicatedCode
-    def draw(self):
+    def aim_points(self, bucket):
         """
-        Drawing shotgun with wide-angle aim
+        Request for the wide-angle aim relative to the chamber
+        :param bucket: int - angle bucket
+        :return: tuple[4 x tuple[float, float]] - vertices of aim polygon
         """
-        x = self.coordinates[0]
-        y = self.coordinates[1]
-        sin = math.sin(self.angle)
-        cos = math.cos(self.angle)
+        sin = SIN_TABLE[bucket]
+        cos = COS_TABLE[bucket]
         length = self.length
         width = self.width
         speed = self.fire_power
-        trans_surface = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pg.SRCALPHA)
         aim_width = self.width + ((self.fire_power - 10) / 40) * 70
-        pg.draw.polygon(
-            trans_surface,
-            RED + (120,),
-            ((x + length * 10 * cos - width / 2 * sin, y + length * 10 * sin + width / 2 * cos),
-             (x + length * self.fire_power * cos - aim_width / 2 * sin, y + length * speed * sin + aim_width / 2 * cos),
-             (x + length * self.fire_power * cos + aim_width / 2 * sin, y + length * speed * sin - aim_width / 2 * cos),
-             (x + length * 10 * cos + width / 2 * sin, y + length * 10 * sin - width / 2 * cos))
-        )
-        self.surface.blit(trans_surface, (0, 0))
-        super().draw()
+        return ((length * 10 * cos - width / 2 * sin, length * 10 * sin + width / 2 * cos),
+                (length * speed * cos - aim_width / 2 * sin, length * speed * sin + aim_width / 2 * cos),
+                (length * speed * cos + aim_width / 2 * sin, length * speed * sin - aim_width / 2 * cos),
+                (length * 10 * cos + width / 2 * sin, length * 10 * sin - width / 2 * cos))
+
+    def polygons(self, bucket):
+        """
+        Request for the polygons of the image of shotgun with wide-angle aim
+        :param bucket: int - angle bucket
+        :return: list[tuple[color, tuple[tuple[float, float]]]] - (color, vertices relative to the chamber)
+        """
+        return [(RED + (120,), self.aim_points(bucket))] + super().polygons(bucket)
 
     def get_type(self):
         """
@@ -732,155 +2122,955 @@ class Shotgun(Gun):
         return "Shotgun"
 
 
+TRAJECTORIES = Trajectory.TrajectoryTable(GRAVITATION, ANGLE_BUCKETS, muzzle_length=40)
+
+
+class ArcPreview:
+    """
+    Dotted arc of the shot of the Gun with its current angle and fire power (taken from TRAJECTORIES), that ends at
+    the ground or at the side of the screen
+    """
+
+    def __init__(self, every=3, rad=2, color=RED):
+        """
+        Initializing an ArcPreview
+        :param every: int - number of ticks between dots
+        :param rad: int - radius of dot
+        :param color: tuple[int, int, int] - color of dots
+        """
+        self.every = every
+        self.rad = rad
+        self.color = color
+        self.sprites = []
+
+    def update(self, gun, alpha=1):
+        """
+        Placing dots along the arc of the Gun before the tick of landing (found by TRAJECTORIES.landing)
+        :param gun: Gun object - aiming Gun
+        :param alpha: float - part of the tick passed since the last tick
+        """
+        x, y = interpolate(gun.previous_coordinates, gun.coordinates, alpha)
+        bucket = angle_bucket(gun.angle)
+        landing_tick, _ = TRAJECTORIES.landing(bucket, gun.fire_power, SCREEN_HEIGHT - GROUND_HEIGHT / 2 - y)
+        xs, ys = TRAJECTORIES.arc(bucket, gun.fire_power, self.every)
+        xs = xs[:-(-landing_tick // self.every)] + x
+        ys = ys[:len(xs)] + y
+        outside = (xs < 0) | (xs > SCREEN_WIDTH)
+        if outside.any():
+            xs = xs[:outside.argmax()]
+            ys = ys[:outside.argmax()]
+        sprite = circle_sprite(self.rad, self.color)
+        self.sprites = [(sprite, (dot_x - self.rad, dot_y - self.rad)) for dot_x, dot_y in
+                        zip(xs.tolist(), ys.tolist())]
+
+    def get_sprites(self):
+        """
+        Request for the images of dots and their positions
+        :return: list[tuple[Pygame Surface object, tuple[float, float]]] - (image of dot, top left corner)
+        """
+        return self.sprites
+
+    def get_draw_box(self, alpha=1):
+        """
+        Request for the rectangle covered by the dots
+        :param alpha: float - part of the tick passed since the last tick (dots are placed in update)
+        :return: Pygame Rect object - covered rectangle
+        """
+        if not self.sprites:
+            return pg.Rect(0, 0, 0, 0)
+        return points_rect([position for _, position in self.sprites] +
+                           [(x + 2 * self.rad, y + 2 * self.rad) for _, (x, y) in self.sprites])
+
+
+class TankBot:
+    """
+    Controller of the Tank, that is not under player control: it dodges falling bombs, chooses the target that is
+    worth the most per tick of charge and flight (moving targets are led) and shoots it with the aim taken from
+    TRAJECTORIES. Targets are evaluated a few at a time, so a pass over hundreds of targets is spread across many
+    ticks. The work of a tick is limited by the number of aim solutions (what is left of the budget after dodging,
+    divided by the nominal cost of a solution) and by the deadline: no aim solution is started, when its nominal
+    cost does not fit the time left. Dodging solves only bombs, that can fall on the Tank (bombs are filtered by the
+    x range of the Tank as arrays), and firing only charges the Gun. The number of aim solutions made in a tick, that
+    was cut by the deadline, is kept in cut, so a recording can replay the tick exactly; ticks over the budget are
+    counted in overruns
+    """
+
+    FIRE_START = pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=(0, 0))
+    FIRE_END = pg.event.Event(pg.MOUSEBUTTONUP, button=1, pos=(0, 0))
+    AIM_COST_US = 100
+    DODGE_COST_US = 40
+
+    def __init__(self, budget_us=250, dodge_margin=20):
+        """
+        Initializing a TankBot
+        :param budget_us: float - time of one tick of the bot in microseconds, that sets the deadline and the number
+                          of aim solutions per tick
+        :param dodge_margin: float - distance kept between falling bombs and the Tank
+        """
+        self.budget_ns = budget_us * 1000
+        self.aims_per_tick = max(1, int((budget_us - self.DODGE_COST_US) // self.AIM_COST_US))
+        self.dodge_margin = dodge_margin
+        self.gun = None
+        self.cursor = 0
+        self.best = None
+        self.chosen = None
+        self.shot = None
+        self.overruns = 0
+        self.deadline = 0
+        self.limit = None
+        self.cut = None
+
+    def reset(self):
+        """
+        Forgetting targets and the shot and cancelling the charge of the Gun, that the bot leaves (when the Tank is
+        switched or one Tank is left)
+        """
+        self.cursor = 0
+        self.best = None
+        self.chosen = None
+        self.shot = None
+        if self.gun is not None:
+            self.gun.fire_on = 0
+            self.gun.fire_power = 10
+            self.gun = None
+
+    def act(self, tank, gun, targets, projectiles, limit=None):
+        """
+        Controlling the Tank and its Gun within a tick (the charge of a newly taken Gun is cancelled), cut records
+        the number of aim solutions made before the deadline, if the work was cut by it (None otherwise)
+        :param tank: Tank object - controlled Tank
+        :param gun: Gun object - Gun of the Tank
+        :param targets: EntityList object - targets of the game
+        :param projectiles: ProjectileStore object - projectiles of the game
+        :param limit: int - number of aim solutions allowed within the tick instead of the deadline (when the tick is
+                      replayed), None - the work is cut at the deadline
+        :return: list[Projectile object] - new projectiles (None if the Gun has not fired)
+        """
+        start = time.perf_counter_ns()
+        self.deadline = start + self.budget_ns
+        self.limit = limit
+        self.cut = None
+        if gun is not self.gun:
+            self.reset()
+            self.gun = gun
+            gun.fire_on = 0
+            gun.fire_power = 10
+        self.dodge(tank, projectiles)
+        new_projectiles = None
+        if self.shot is not None:
+            new_projectiles = self.fire(gun, targets)
+        else:
+            self.evaluate_targets(gun, targets)
+        if time.perf_counter_ns() - start > self.budget_ns:
+            self.overruns += 1
+        return new_projectiles
+
+    def dodge(self, tank, projectiles):
+        """
+        Moving the Tank away from the bomb, that falls on it first (the Tank stands if no bomb threatens it)
+        :param tank: Tank object - controlled Tank
+        :param projectiles: ProjectileStore object - projectiles of the game
+        """
+        tank.velocity[0] = 0
+        n = len(projectiles)
+        rows = np.flatnonzero((projectiles.kinds[:n] == KIND_BOMB) & projectiles.alive[:n])
+        if len(rows) == 0:
+            return
+        left, top, right, _ = tank.HITBOX_BOUNDS
+        reach = max(-left, right) + self.dodge_margin + MAX_PROJECTILE_RAD
+        near = (np.abs(projectiles.coordinates[rows, 0] - tank.coordinates[0]) < reach) | \
+            (projectiles.velocities[rows, 0] != 0)
+        rows = rows[near]
+        first = None
+        for (x, y), (vx, vy), rad in zip(projectiles.coordinates[rows].tolist(),
+                                         projectiles.velocities[rows].tolist(), projectiles.rads[rows].tolist()):
+            fall = max(tank.coordinates[1] + top - rad - y, 0)
+            ticks = (-vy + math.sqrt(vy ** 2 + 2 * GRAVITATION * fall)) / GRAVITATION
+            landing = x + vx * ticks - tank.coordinates[0]
+            if left - rad - self.dodge_margin < landing < right + rad + self.dodge_margin and \
+                    (first is None or ticks < first[0]):
+                first = (ticks, landing)
+        if first is None:
+            return
+        direction = 1 if first[1] <= 0 else -1
+        destination = tank.coordinates[0] + direction * (right - left)
+        if destination + left < 0 or destination + right > SCREEN_WIDTH:
+            direction = -direction
+        tank.velocity[0] = direction * tank.SPEED
+
+    def evaluate_targets(self, gun, targets):
+        """
+        Evaluating next targets while the tick allows their aim solutions, the best target is chosen at the end of
+        the pass over all targets and the Gun starts charging as soon as the shot at it is aimed again
+        :param gun: Gun object - Gun of the Tank
+        :param targets: EntityList object - targets of the game
+        """
+        aims = 0
+        while True:
+            if self.chosen is not None:
+                target = targets.get(self.chosen)
+                if target is None:
+                    self.chosen = None
+                    return
+                if not self.allows(aims, self.aim_calls(target)):
+                    return
+                self.chosen = None
+                shot = self.evaluate(gun, target)
+                if shot is not None:
+                    self.shot = (target.handle, shot[1], shot[2])
+                    gun.angle = shot[1] * ANGLE_STEP
+                    gun.fire_start(self.FIRE_START)
+                return
+            if self.cursor >= len(targets):
+                if self.best is not None:
+                    self.chosen = self.best[1]
+                self.cursor = 0
+                self.best = None
+                if self.chosen is None:
+                    return
+                continue
+            target = targets[self.cursor]
+            if not self.allows(aims, self.aim_calls(target)):
+                return
+            aims += self.aim_calls(target)
+            self.cursor += 1
+            shot = self.evaluate(gun, target)
+            if shot is not None and (self.best is None or shot[0] > self.best[0]):
+                self.best = (shot[0], target.handle)
+
+    def allows(self, aims, needed):
+        """
+        Check if the evaluation fits the tick: it fits the number of aim solutions per tick (the first evaluation of
+        the tick always does) and its nominal cost fits the time left before the deadline (or the limit, when the
+        tick is replayed). The tick is marked as cut, if only the deadline or the limit stops the evaluation
+        :param aims: int - number of aim solutions made within the tick
+        :param needed: int - number of aim solutions needed for the evaluation
+        :return: bool - can the evaluation be made
+        """
+        if aims and aims + needed > self.aims_per_tick:
+            return False
+        if self.limit is not None:
+            fits = aims < self.limit
+        else:
+            fits = time.perf_counter_ns() + needed * self.AIM_COST_US * 1000 <= self.deadline
+        if not fits:
+            self.cut = aims
+        return fits
+
+    @staticmethod
+    def aim_calls(target):
+        """
+        Request for the number of aim solutions needed to evaluate the target
+        :param target: Vehicle object - evaluated target
+        :return: int - 2 for moving targets (the second one is led), otherwise 1
+        """
+        return 2 if target.velocity[0] != 0 or target.velocity[1] != 0 else 1
+
+    @staticmethod
+    def evaluate(gun, target):
+        """
+        Aiming at the point, where the target will be when the shot reaches it (after the charge and the flight)
+        :param gun: Gun object - Gun of the Tank
+        :param target: Vehicle object - evaluated target
+        :return: tuple[float, int, int] - (experience points per tick of charge and flight per hit point,
+                 angle bucket, fire power), None if the shot does not reach the target within the screen
+        """
+        x = target.coordinates[0] - gun.coordinates[0]
+        y = target.coordinates[1] - gun.coordinates[1]
+        shot = TRAJECTORIES.aim(x, y)
+        if shot is None:
+            return None
+        if target.velocity[0] != 0 or target.velocity[1] != 0:
+            lead = TRAJECTORIES.lead_ticks(shot)
+            x += target.velocity[0] * lead
+            y += target.velocity[1] * lead
+            if not 0 <= gun.coordinates[0] + x <= SCREEN_WIDTH:
+                return None
+            shot = TRAJECTORIES.aim(x, y)
+            if shot is None:
+                return None
+        bucket, power, moment = shot
+        return target.exp_points / (max(target.hit_points, 1) * (power - 10 + moment)), bucket, power
+
+    def fire(self, gun, targets):
+        """
+        Charging the Gun and firing when its power is reached (the shot is cancelled if the target is gone)
+        :param gun: Gun object - Gun of the Tank
+        :param targets: EntityList object - targets of the game
+        :return: list[Projectile object] - new projectiles (None if the Gun has not fired)
+        """
+        handle, bucket, power = self.shot
+        if targets.get(handle) is None:
+            self.shot = None
+            gun.fire_on = 0
+            gun.fire_power = 10
+            return None
+        if gun.fire_power < power:
+            gun.power_up()
+            return None
+        self.shot = None
+        gun.angle = bucket * ANGLE_STEP
+        return gun.fire_end(self.FIRE_END)
+
+
+class FrameProfiler:
+    """
+    Timer of every phase of the game loop, that keeps rolling percentiles of phase times and entity counts
+    """
+
+    def __init__(self, window=600, overlay=False, record_trace=False):
+        """
+        Initializing a FrameProfiler
+        :param window: int - number of last frames used for percentiles
+        :param overlay: bool - are timings drawn on the screen
+        :param record_trace: bool - are timings of every frame kept for dump
+        """
+        self.window = window
+        self.overlay = overlay
+        self.record_trace = record_trace
+        self.samples = {"frame": deque(maxlen=window)}
+        self.current = {}
+        self.counts = {}
+        self.trace = []
+        self.frames = 0
+        self.font = None
+        self.overlay_texture = None
+
+    def measure(self, phase, function, *args):
+        """
+        Calling the function and adding its time to the phase time of the current frame
+        :param phase: string - name of phase
+        :param function: function - measured function
+        :return: result of the function
+        """
+        start = time.perf_counter_ns()
+        result = function(*args)
+        self.current[phase] = self.current.get(phase, 0) + time.perf_counter_ns() - start
+        return result
+
+    def end_frame(self, ticks, counts):
+        """
+        Saving phase times of the current frame and starting the next one
+        :param ticks: int - number of simulation ticks processed since the start of the game
+        :param counts: dict{string: int} - number of entities of every kind
+        """
+        for phase, duration in self.current.items():
+            if phase not in self.samples:
+                self.samples[phase] = deque(maxlen=self.window)
+            self.samples[phase].append(duration)
+        self.samples["frame"].append(sum(self.current.values()))
+        self.counts = counts
+        if self.record_trace:
+            record = {"frame": self.frames, "tick": ticks}
+            record.update(self.current)
+            record.update(counts)
+            self.trace.append(record)
+        self.current = {}
+        self.frames += 1
+
+    def percentiles(self, phase):
+        """
+        Request for the percentiles of phase time over the last frames
+        :param phase: string - name of phase
+        :return: dict{string: float} - {"p50": ms, "p95": ms, "p99": ms}
+        """
+        samples = sorted(self.samples.get(phase, ()))
+        if not samples:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        return {name: samples[min(len(samples) - 1, int(len(samples) * part))] / 1e6
+                for name, part in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))}
+
+    def report(self):
+        """
+        Request for the percentiles of every phase and the last entity counts
+        :return: dict - {"phases": {phase: percentiles}, "counts": counts}
+        """
+        return {"phases": {phase: self.percentiles(phase) for phase in self.samples}, "counts": dict(self.counts)}
+
+    def draw(self, surface):
+        """
+        Drawing timings in the upper left corner of the screen (text is updated twice a second)
+        :param surface: Pygame Surface object - target surface
+        :return: Pygame Rect object - covered rectangle
+        """
+        if self.overlay_texture is None or self.frames % (FPS // 2) == 0:
+            if self.font is None:
+                pg.font.init()
+                self.font = pg.font.Font(None, 20)
+            lines = ["{:<18}{:>8}{:>8}{:>8}".format("phase, ms", "p50", "p95", "p99")]
+            for phase in self.samples:
+                values = self.percentiles(phase)
+                lines.append("{:<18}{:>8.3f}{:>8.3f}{:>8.3f}".format(phase, values["p50"], values["p95"],
+                                                                     values["p99"]))
+            lines.append(", ".join("{}: {}".format(name, count) for name, count in self.counts.items()))
+            rendered = [self.font.render(line, True, GREY, SKY) for line in lines]
+            self.overlay_texture = pg.Surface((max(line.get_width() for line in rendered),
+                                               sum(line.get_height() for line in rendered)))
+            self.overlay_texture.fill(SKY)
+            y = 0
+            for line in rendered:
+                self.overlay_texture.blit(line, (0, y))
+                y += line.get_height()
+        return surface.blit(self.overlay_texture, (0, 0))
+
+    def dump(self, path):
+        """
+        Writing the trace of every frame to the file (.json - JSON, otherwise CSV)
+        :param path: string - path to the file
+        """
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump({"summary": self.report(), "frames": self.trace}, file)
+            return
+        columns = []
+        for record in self.trace:
+            for column in record:
+                if column not in columns:
+                    columns.append(column)
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, columns, restval=0)
+            writer.writeheader()
+            writer.writerows(self.trace)
+
+
+class InputHandler:
+    """
+    Input layer between the event queue and Gameplay: it maps keys to actions through the binding table and passes
+    only events that change the input state, with mouse motion coalesced to the latest position
+    """
+
+    def __init__(self, bindings=None):
+        """
+        Initializing an InputHandler
+        :param bindings: dict - {action name: key code}, KEY_BINDINGS if not given
+        """
+        self.bindings = dict(KEY_BINDINGS if bindings is None else bindings)
+        self.actions = {key: action for action, key in self.bindings.items()}
+        self.pressed = set()
+        self.mouse_position = None
+
+    @staticmethod
+    def block_unused_events():
+        """
+        Keeping frequent events, that the game never reads (text input, wheel, touch and joystick motion), out of the
+        event queue; window and focus events stay in it
+        """
+        pg.event.set_blocked(list(UNUSED_EVENT_TYPES))
+
+    def action(self, event):
+        """
+        Request for the action bound to the key of the event
+        :param event: Pygame event object - KEYDOWN or KEYUP event
+        :return: string - name of action (None if the key is not bound)
+        """
+        return self.actions.get(event.key)
+
+    def filter(self, events):
+        """
+        Selecting events that change the input state: motion between two other events is reduced to its latest
+        position (so the order of aiming and shooting is kept), repeated key presses and releases are dropped
+        :param events: iterable[Pygame event object] - events from the queue or from the recording
+        :return: list[Pygame event object] - events to dispatch
+        """
+        dispatched = []
+        motion = None
+        for event in events:
+            if event.type == pg.MOUSEMOTION:
+                motion = event
+                continue
+            if motion is not None:
+                self.add_motion(dispatched, motion)
+                motion = None
+            if event.type == pg.KEYDOWN:
+                if event.key in self.pressed:
+                    continue
+                self.pressed.add(event.key)
+            elif event.type == pg.KEYUP:
+                if event.key not in self.pressed:
+                    continue
+                self.pressed.discard(event.key)
+            elif event.type not in INPUT_EVENT_TYPES:
+                continue
+            dispatched.append(event)
+        if motion is not None:
+            self.add_motion(dispatched, motion)
+        return dispatched
+
+    def add_motion(self, dispatched, motion):
+        """
+        Adding the motion event if the cursor has moved
+        :param dispatched: list[Pygame event object] - events to dispatch
+        :param motion: Pygame event object - latest MOUSEMOTION event
+        """
+        if motion.pos != self.mouse_position:
+            self.mouse_position = motion.pos
+            dispatched.append(motion)
+
+
+class InputRecording:
+    """
+    Compact record of player input consumed by Gameplay on every tick, that can be saved, loaded and replayed
+    """
+
+    EVENT_TYPES = INPUT_EVENT_TYPES
+    SETTINGS = ("spawn_rate", "max_targets", "spawn_weights", "precise_collision", "bot")
+
+    def __init__(self, seed, size, events=None, ticks=0, settings=None, bot_cuts=None):
+        """
+        Initializing an InputRecording
+        :param seed: int - seed of the random numbers of the recorded game
+        :param size: list[int, int] - [width of screen, height of screen] of the recorded game
+        :param events: list[list[5 x int]] - [tick, event type, key or button, x of position, y of position]
+                       for every event
+        :param ticks: int - number of ticks in the recorded game
+        :param settings: dict - {name of command line option from SETTINGS: value} of the recorded game, that change
+                         the simulation (options missing in old recordings keep their defaults)
+        :param bot_cuts: list[list[2 x int]] - [tick, number of aim solutions] for every tick, where the work of
+                         TankBot was cut by its deadline
+        """
+        self.seed = seed
+        self.size = [size[0], size[1]]
+        self.events = [] if events is None else events
+        self.ticks = ticks
+        self.settings = {} if settings is None else dict(settings)
+        self.bot_cuts = [] if bot_cuts is None else bot_cuts
+        self.position = 0
+        self.bot_position = 0
+
+    def record(self, tick, event):
+        """
+        Adding the event consumed before the tick
+        :param tick: int - number of tick
+        :param event: Pygame event object - consumed event
+        """
+        if event.type not in self.EVENT_TYPES:
+            return
+        key = getattr(event, "key", getattr(event, "button", 0))
+        position = getattr(event, "pos", (0, 0))
+        self.events.append([tick, event.type, key, int(position[0]), int(position[1])])
+
+    def events_for(self, tick):
+        """
+        Request for the recorded events consumed before the tick (ticks have to be requested in order)
+        :param tick: int - number of tick
+        :return: list[Pygame event object] - recorded events
+        """
+        events = []
+        while self.position < len(self.events) and self.events[self.position][0] <= tick:
+            _, event_type, key, x, y = self.events[self.position]
+            if event_type in (pg.KEYDOWN, pg.KEYUP):
+                events.append(pg.event.Event(event_type, key=key))
+            elif event_type == pg.MOUSEMOTION:
+                events.append(pg.event.Event(event_type, pos=(x, y)))
+            elif event_type in (pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP):
+                events.append(pg.event.Event(event_type, button=key, pos=(x, y)))
+            else:
+                events.append(pg.event.Event(event_type))
+            self.position += 1
+        return events
+
+    def record_bot_cut(self, tick, aims):
+        """
+        Adding the tick, where the work of TankBot was cut by its deadline
+        :param tick: int - number of tick
+        :param aims: int - number of aim solutions made before the deadline
+        """
+        self.bot_cuts.append([tick, aims])
+
+    def bot_cut_for(self, tick):
+        """
+        Request for the number of aim solutions, that TankBot made before its deadline within the tick (ticks have to
+        be requested in order)
+        :param tick: int - number of tick
+        :return: int - number of aim solutions, None if the work of the tick was not cut
+        """
+        while self.bot_position < len(self.bot_cuts) and self.bot_cuts[self.bot_position][0] < tick:
+            self.bot_position += 1
+        if self.bot_position < len(self.bot_cuts) and self.bot_cuts[self.bot_position][0] == tick:
+            return self.bot_cuts[self.bot_position][1]
+        return None
+
+    def save(self, path):
+        """
+        Writing the recording to the JSON file
+        :param path: string - path to the file
+        """
+        with open(path, "w") as file:
+            json.dump({"seed": self.seed, "size": self.size, "ticks": self.ticks, "settings": self.settings,
+                       "events": self.events, "bot_cuts": self.bot_cuts}, file)
+
+    @staticmethod
+    def load(path):
+        """
+        Reading the recording from the JSON file
+        :param path: string - path to the file
+        :return: InputRecording object - loaded recording
+        """
+        with open(path) as file:
+            data = json.load(file)
+        return InputRecording(data["seed"], data["size"], data["events"], data["ticks"], data.get("settings"),
+                              data.get("bot_cuts"))
+
+
+VEHICLE_TYPES = {"Tank": Tank, "AirBalloon": AirBalloon, "Airship": Airship}
+TARGET_TYPES = {"AirBalloon": AirBalloon, "Airship": Airship}
+
+
+class SpawnTable:
+    """
+    Targets spawned during the game: kinds of targets with their weights, the average number of spawns per second
+    and the maximum number of targets at once
+    """
+
+    def __init__(self, rate=1 / 5, weights=None, cap=4):
+        """
+        Initializing a SpawnTable
+        :param rate: float - average number of spawns per second
+        :param weights: dict{string: float} - {name of target type: weight}, AirBalloon 4 and Airship 1 if not given
+        :param cap: int - maximum number of targets at once (spawns above it are skipped)
+        """
+        self.rate = rate
+        self.weights = {"AirBalloon": 4, "Airship": 1} if weights is None else dict(weights)
+        self.cap = cap
+
+    def interval(self, rng=rand):
+        """
+        Request for the time until the next spawn
+        :param rng: Random object - source of random numbers (global random module if not given)
+        :return: float - number of ticks
+        """
+        return exponential_interval(self.rate, rng)
+
+    def create(self, surface, rng=rand):
+        """
+        Creating a target of the type chosen by weights
+        :param surface: Pygame Surface object - target surface
+        :param rng: Random object - source of random numbers (global random module if not given)
+        :return: Vehicle object - new target
+        """
+        name = rng.choices(list(self.weights), list(self.weights.values()))[0]
+        return TARGET_TYPES[name](surface, rng)
+
+
+def set_precise_collision(type_names):
+    """
+    Switching on pixel mask collision for the vehicle types (has to be done before the Gameplay is created)
+    :param type_names: list[string] - names of vehicle types ("Tank", "AirBalloon", "Airship")
+    """
+    for name, vehicle_type in VEHICLE_TYPES.items():
+        vehicle_type.PRECISE_COLLISION = name in type_names
+
+
 class Gameplay:
     """
     Gameplay itself
     """
-    def __init__(self, surface):
+    def __init__(self, surface, headless=False, draw=True, dirty_rects=False, fps=FPS, profiler=None, seed=None,
+                 recording=None, replay=None, aim_preview=False, bot=False, spawn_table=None):
         """
         Initialising of Gameplay
         :param surface: Pygame Surface object - target surface
+        :param headless: bool - is game simulated without updating the display and limiting the frame rate
+        :param draw: bool - are objects drawn on the target surface
+        :param dirty_rects: bool - are only changed parts of the screen redrawn and updated
+        :param fps: int - maximum number of frames drawn per second (0 - unlimited), simulation always runs with
+                    TICK_RATE ticks per second
+        :param profiler: FrameProfiler object - timer of game loop phases (None - phases are not timed)
+        :param seed: int - seed of the random numbers of the game (random seed if not given)
+        :param recording: InputRecording object - recording, where player input is saved (None - not recorded)
+        :param replay: InputRecording object - recording, that is replayed instead of player input
+        :param aim_preview: bool - is the arc of the shot of the controlled Gun drawn
+        :param bot: bool - is the Tank, that is not under player control, controlled by TankBot
+        :param spawn_table: SpawnTable object - targets spawned during the game (SpawnTable() if not given)
         """
         self.surface = surface
+        self.headless = headless
+        self.draw = draw
+        self.dirty_rects = dirty_rects
+        self.fps = fps
+        self.profiler = profiler
+        if seed is None:
+            seed = rand.randrange(2 ** 32)
+        self.seed = seed
+        self.rng = rand.Random(seed)
+        self.recording = recording
+        self.replay = replay
+        self.ticks = 0
         self.ground = Ground(surface)
-        self.tanks_list = [Tank(surface, 300, ControlButtons([100, 97])),
-                           Tank(surface, 1200, ControlButtons([1073741903, 1073741904]))]
+        self.background = Background(SKY, [self.ground])
+        self.render_queue = RenderQueue()
+        self.arc_preview = ArcPreview() if aim_preview else None
+        self.tank_bot = TankBot() if bot else None
+        self.previous_rects = []
+        self.update_rects = None
+        self.input_handler = InputHandler()
+        bindings = self.input_handler.bindings
+        self.tanks_list = EntityList([
+            Tank(surface, 300, ControlButtons([bindings["left_tank_right"], bindings["left_tank_left"]]), 0),
+            Tank(surface, 1200, ControlButtons([bindings["right_tank_right"], bindings["right_tank_left"]]), 1)])
         self.tank_under_control = 0
-        self.guns_list = [Artillery(surface, self.tanks_list[0].coordinates),
-                          Shotgun(surface, self.tanks_list[1].coordinates)]
+        self.guns_list = EntityList([Artillery(surface, self.tanks_list[0].coordinates),
+                                     Shotgun(surface, self.tanks_list[1].coordinates)])
         self.score_list = [0, 0]
-        self.targets_list = []
-        self.projectiles_list = []
-        self.particles_list = []
+        self.targets_list = EntityList()
+        self.projectiles = ProjectileStore()
+        self.particles_list = EntityList()
+        self.vehicles_grid = SpatialHash(GRID_CELL_SIZE, MAX_PROJECTILE_RAD)
+        self.vehicles_grid.rebuild(self.tanks_list)
         self.clock = pg.time.Clock()
         self.finished = False
+        self.shots_fired = 0
+        self.projectiles_fired = 0
+        self.hits = 0
+        self.spawn_table = SpawnTable() if spawn_table is None else spawn_table
+        self.next_spawn = self.spawn_table.interval(self.rng)
+        self.bomb_drops = EventScheduler()
 
     def create_new_target(self):
         """
-        Creating one new target (AirBalloon or Airship) with small chance (about once every five seconds)
+        Creating new targets, when their spawns are due (times between spawns are random with the average rate of
+        the spawn table, spawns above its cap are skipped)
         """
-        if len(self.targets_list) < 4 and rand.random() < 1 / (FPS * 5):
-            if rand.random() < 0.2:
-                self.targets_list.append(Airship(self.surface))
-            else:
-                self.targets_list.append(AirBalloon(self.surface))
+        while self.next_spawn <= self.ticks:
+            self.next_spawn += self.spawn_table.interval(self.rng)
+            if len(self.targets_list) < self.spawn_table.cap:
+                self.add_target(self.spawn_table.create(self.surface, self.rng))
 
-    def draw_objects(self):
+    def add_target(self, target):
+        """
+        Adding a target to the game (the first bomb drop is scheduled, if the target drops bombs)
+        :param target: Vehicle object - new target
+        """
+        self.targets_list.add(target)
+        self.vehicles_grid.insert(target)
+        if target.BOMB_RATE:
+            self.schedule_bomb_drop(target)
+
+    def schedule_bomb_drop(self, target):
+        """
+        Scheduling the next bomb drop of the target after a random time (BOMB_RATE bombs per second on average)
+        :param target: Vehicle object - target, that drops bombs
+        """
+        self.bomb_drops.schedule(self.ticks + exponential_interval(target.BOMB_RATE, self.rng), target.handle)
+
+    def draw_objects(self, alpha=1):
         """
         Drawing background and every vehicle, gun, projectile and particle
+        :param alpha: float - part of the tick passed since the last tick (objects are drawn between their previous
+                      and current positions)
         """
-        self.surface.fill(SKY)
-        self.ground.draw()
-        for gun in self.guns_list:
-            gun.draw()
-        for tank in self.tanks_list:
-            tank.draw()
-        for target in self.targets_list:
-            target.draw()
-        for projectile in self.projectiles_list:
-            projectile.draw()
-        for particle in self.particles_list:
-            particle.draw()
+        if not self.dirty_rects or self.update_rects is None:
+            self.background.draw(self.surface)
+        else:
+            self.background.restore(self.surface, self.previous_rects)
+        vehicles = [veh for veh in chain(self.tanks_list, self.targets_list) if veh.is_visible()]
+        projectile_rows = self.projectiles.visible_rows()
+        particles = [particle for particle in self.particles_list if particle.is_visible()]
+        queue = self.render_queue
+        queue.extend(LAYER_GUNS, [gun.get_sprite(alpha) for gun in self.guns_list])
+        previews = []
+        if self.arc_preview is not None and len(self.guns_list):
+            self.arc_preview.update(self.guns_list[self.tank_under_control], alpha)
+            queue.extend(LAYER_GUNS, self.arc_preview.get_sprites())
+            previews.append(self.arc_preview)
+        queue.extend(LAYER_VEHICLES, [veh.get_sprite(alpha) for veh in vehicles])
+        queue.extend(LAYER_PROJECTILES, self.projectiles.get_sprites(alpha, projectile_rows))
+        queue.extend(LAYER_PARTICLES, [particle.get_sprite(alpha) for particle in particles])
+        queue.flush(self.surface)
+        if self.dirty_rects:
+            projectiles = [self.projectiles.objects[row] for row in projectile_rows.tolist()]
+            self.track_dirty_rects(alpha, previews + vehicles + projectiles + particles)
+
+    def track_dirty_rects(self, alpha=1, drawn_objects=()):
+        """
+        Collecting rectangles covered by objects in this frame, the screen is updated in them and in the rectangles
+        covered in the previous frame (that were restored from the background)
+        :param alpha: float - part of the tick passed since the last tick
+        :param drawn_objects: list - vehicles, projectiles and particles drawn in this frame
+        """
+        current_rects = [gun.get_draw_box(alpha) for gun in self.guns_list]
+        for drawn_object in drawn_objects:
+            current_rects.append(drawn_object.get_draw_box(alpha))
+        if self.update_rects is None:
+            self.update_rects = [self.surface.get_rect()]
+        else:
+            self.update_rects = self.previous_rects + current_rects
+        self.previous_rects = current_rects
 
     def display_update(self):
         """
         Updating display to reflect changes of objects
         """
-        pg.display.update()
-        self.clock.tick(FPS)
+        if self.dirty_rects and self.update_rects is not None:
+            pg.display.update(self.update_rects)
+        else:
+            pg.display.update()
+        self.clock.tick(self.fps)
 
     def process_input(self):
         """
-        Processing all player input
+        Processing all player input (recorded input if Gameplay is a replay)
         """
-        for event in pg.event.get():
+        if self.replay is None:
+            events = pg.event.get()
+        else:
+            events = self.replay.events_for(self.ticks)
+            if self.ticks >= self.replay.ticks:
+                self.finished = True
+        for event in self.input_handler.filter(events):
+            if self.recording is not None:
+                self.recording.record(self.ticks, event)
             if event.type == pg.QUIT:
                 self.finished = True
 
             elif event.type == pg.KEYDOWN:
-                if event.key == 32 and self.tank_under_control == 0 and len(self.tanks_list) != 1:
+                action = self.input_handler.action(event)
+                if action == "switch_tank" and self.tank_under_control == 0 and len(self.tanks_list) != 1:
                     self.tanks_list[self.tank_under_control].velocity = [0, 0]
                     self.tank_under_control = 1
-                elif event.key == 32 and self.tank_under_control == 1:
+                    self.tanks_list[self.tank_under_control].velocity = [0, 0]
+                    if self.tank_bot is not None:
+                        self.tank_bot.reset()
+                elif action == "switch_tank" and self.tank_under_control == 1:
                     self.tanks_list[self.tank_under_control].velocity = [0, 0]
                     self.tank_under_control = 0
-                if event.key == 1073742048 and self.guns_list[self.tank_under_control].get_type() == "Artillery":
+                    self.tanks_list[self.tank_under_control].velocity = [0, 0]
+                    if self.tank_bot is not None:
+                        self.tank_bot.reset()
+                if action == "switch_gun" and self.guns_list[self.tank_under_control].get_type() == "Artillery":
                     self.guns_list[self.tank_under_control] = Shotgun(self.surface, self.tanks_list[0].coordinates)
-                elif event.key == 1073742048 and self.guns_list[self.tank_under_control].get_type() == "Shotgun":
+                elif action == "switch_gun" and self.guns_list[self.tank_under_control].get_type() == "Shotgun":
                     self.guns_list[self.tank_under_control] = Artillery(self.surface, self.tanks_list[0].coordinates)
+                self.tanks_list[self.tank_under_control].control(event)
 
-            self.tanks_list[self.tank_under_control].control(event)
-            self.guns_list[self.tank_under_control].targetting(event)
-            self.guns_list[self.tank_under_control].fire_start(event)
-            new_projectiles = self.guns_list[self.tank_under_control].fire_end(event)
-            if new_projectiles is not None:
-                self.projectiles_list = self.projectiles_list + new_projectiles
+            elif event.type == pg.KEYUP:
+                self.tanks_list[self.tank_under_control].control(event)
 
-        self.guns_list[self.tank_under_control].power_up()
+            elif event.type == pg.MOUSEMOTION:
+                self.guns_list[self.tank_under_control].targetting(event)
+
+            elif event.type == pg.MOUSEBUTTONDOWN:
+                self.guns_list[self.tank_under_control].fire_start(event)
+
+            elif event.type == pg.MOUSEBUTTONUP:
+                self.add_shot(self.tanks_list[self.tank_under_control],
+                              self.guns_list[self.tank_under_control].fire_end(event))
+
+    def add_shot(self, tank, new_projectiles):
+        """
+        Adding projectiles fired by the Gun of the Tank (they remember the score index of the Tank, that gets
+        experience for kills)
+        :param tank: Tank object - Tank, that has fired
+        :param new_projectiles: list[Projectile object] - new projectiles (None if the Gun has not fired)
+        """
+        if new_projectiles is None:
+            return
+        for projectile in new_projectiles:
+            projectile.owner = tank.score_index
+        self.projectiles.extend(new_projectiles)
+        self.shots_fired += 1
+        self.projectiles_fired += len(new_projectiles)
 
     def move_object(self):
         """
         Moving every vehicle, gun and projectile according to thy movement rules
         """
-        for tank in self.tanks_list:
-            tank.move()
-        for target in self.targets_list:
-            target.move()
-        for projectile in self.projectiles_list:
-            projectile.move()
-        self.guns_list[self.tank_under_control].move_to([self.tanks_list[self.tank_under_control].coordinates[0],
-                                                         self.tanks_list[self.tank_under_control].coordinates[1] - 15])
+        for veh in chain(self.tanks_list, self.targets_list):
+            if veh.move():
+                self.vehicles_grid.update(veh)
+        self.projectiles.move(GRAVITATION)
+        self.guns_list[self.tank_under_control].power_up()
+        for gun, tank in zip(self.guns_list, self.tanks_list):
+            gun.move_to([tank.coordinates[0], tank.coordinates[1] - 15])
 
     def ai_acts(self):
         """
-        Acting of artificial intelligence of vehicles
-        """
-        for target in self.targets_list:
-            if target.get_type() == "Airship" and rand.random() < 1 / (FPS * 5):
-                self.projectiles_list.append(target.drop_bomb())
-
-    def projectile_remove(self, projectile):
-        if projectile in self.projectiles_list:
-            self.projectiles_list.remove(projectile)
+        Acting of artificial intelligence of vehicles: due bombs are dropped and next drops are scheduled (drops of
+        removed targets are skipped)
+        """
+        for handle in self.bomb_drops.pop_due(self.ticks):
+            target = self.targets_list.get(handle)
+            if target is not None:
+                self.projectiles.add(target.drop_bomb())
+                self.schedule_bomb_drop(target)
+
+    def bot_acts(self):
+        """
+        Acting of TankBot, that controls the Tank not under player control (in the replay it makes as many aim
+        solutions as in the recorded tick, instead of following the clock)
+        """
+        if self.tank_bot is None:
+            return
+        if len(self.tanks_list) < 2:
+            self.tank_bot.reset()
+            return
+        index = 1 - self.tank_under_control
+        limit = None
+        if self.replay is not None:
+            limit = self.replay.bot_cut_for(self.ticks)
+            if limit is None:
+                limit = self.tank_bot.aims_per_tick
+        tank = self.tanks_list[index]
+        self.add_shot(tank, self.tank_bot.act(tank, self.guns_list[index], self.targets_list, self.projectiles,
+                                              limit))
+        if self.recording is not None and self.tank_bot.cut is not None:
+            self.recording.record_bot_cut(self.ticks, self.tank_bot.cut)
 
     def check_hit(self):
         """
         Checking if projectile hit something or out of screen and processing it
         """
-        for projectile in self.projectiles_list:
-            for target in self.targets_list:
-                if projectile.is_hit_vehicle(target):
-                    target.take_damage(projectile.get_damage())
-                    self.projectile_remove(projectile)
-            for tank in self.tanks_list:
-                if projectile.is_hit_vehicle(tank):
-                    tank.take_damage(projectile.get_damage())
-                    self.projectile_remove(projectile)
-            if projectile.is_hit_ground():
-                if projectile.get_type() == "Shell" or projectile.get_type() == "Bomb":
-                    self.particles_list.append(projectile.death())
-                self.projectile_remove(projectile)
-            if projectile.is_out_of_screen():
-                self.projectile_remove(projectile)
+        projectiles = self.projectiles
+        if len(projectiles) == 0:
+            return
+        for row, veh, _ in projectiles.vehicle_hits(self.vehicles_grid):
+            veh.take_damage(int(projectiles.damages[row]))
+            veh.last_hit_by = projectiles.objects[row].owner
+            projectiles.remove(row)
+            if projectiles.kinds[row] != KIND_BOMB and veh.get_type() != "Tank":
+                self.hits += 1
+        hit_ground = projectiles.hit_ground_mask()
+        exploded = hit_ground & projectiles.kind_mask((KIND_SHELL, KIND_BOMB)) & projectiles.alive[:len(projectiles)]
+        for row in np.flatnonzero(exploded).tolist():
+            self.particles_list.append(projectiles.objects[row].death())
+        projectiles.remove_mask(hit_ground | projectiles.out_of_screen_mask())
+        for projectile in projectiles.compact():
+            projectile.release()
+
+    def killer(self, veh):
+        """
+        Request for the Tank, that gets experience for the killed Vehicle: the one, that fired the last hit into it
+        (the Tank under control, if the last hit was not fired by a Tank)
+        :param veh: Vehicle object - killed Vehicle
+        :return: int - index of the Tank in the score list
+        """
+        if 0 <= veh.last_hit_by < len(self.score_list):
+            return veh.last_hit_by
+        return self.tanks_list[self.tank_under_control].score_index
 
     def remove_vehicle(self):
         """
-        Removing dead vehicles from lists
+        Removing dead vehicles and targets, that have left the world, from lists
         """
         for target in self.targets_list:
             if target.is_dead():
                 new_particle, new_experience = target.death()
                 self.particles_list.append(new_particle)
-                self.score_list[self.tank_under_control] += new_experience
+                self.score_list[self.killer(target)] += new_experience
                 self.targets_list.remove(target)
+                self.vehicles_grid.remove(target)
+            elif target.is_out_of_world():
+                self.targets_list.remove(target)
+                self.vehicles_grid.remove(target)
 
         for tank in self.tanks_list:
             if tank.is_dead():
                 new_particle, new_experience = tank.death()
                 self.particles_list.append(new_particle)
-                self.score_list[self.tank_under_control] += new_experience
-                self.guns_list.pop(self.tanks_list.index(tank))
+                self.score_list[self.killer(tank)] += new_experience
+                self.guns_list.remove(self.guns_list[self.tanks_list.index(tank)])
                 self.tanks_list.remove(tank)
+                self.vehicles_grid.remove(tank)
 
     def process_particles(self):
         """
@@ -900,21 +3090,210 @@ class Gameplay:
         if len(self.tanks_list) == 0:
             self.finished = True
 
-
-screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-
-game = Gameplay(screen)
-
-while not game.finished:
-    game.create_new_target()
-    game.draw_objects()
-    game.display_update()
-    game.process_input()
-    game.move_object()
-    game.ai_acts()
-    game.check_hit()
-    game.remove_vehicle()
-    game.process_particles()
-    game.check_tanks()
-
-pg.quit()
+    def compact_lists(self):
+        """
+        Cutting off entities removed during the tick from every list
+        """
+        self.targets_list.compact()
+        self.tanks_list.compact()
+        self.guns_list.compact()
+        for particle in self.particles_list.compact():
+            particle.release()
+
+    def run_phase(self, phase, function, *args):
+        """
+        Calling one phase of the game loop (timed if there is a profiler)
+        :param phase: string - name of phase
+        :param function: function - phase itself
+        :return: result of the function
+        """
+        if self.profiler is None:
+            return function(*args)
+        return self.profiler.measure(phase, function, *args)
+
+    def count_entities(self):
+        """
+        Request for the number of entities of every kind
+        :return: dict{string: int} - {kind of entities: number}
+        """
+        return {"tanks": len(self.tanks_list), "targets": len(self.targets_list),
+                "projectiles": len(self.projectiles), "particles": len(self.particles_list)}
+
+    def end_frame(self):
+        """
+        Drawing the profiler overlay and finishing the frame in the profiler
+        """
+        if self.profiler is None:
+            return
+        if self.profiler.overlay and self.draw and not self.finished:
+            overlay_rect = self.profiler.draw(self.surface)
+            if self.dirty_rects and self.update_rects is not None:
+                self.previous_rects.append(overlay_rect)
+                self.update_rects.append(overlay_rect)
+        self.profiler.end_frame(self.ticks, self.count_entities())
+
+    def simulate(self):
+        """
+        Processing one simulation tick (1 / TICK_RATE of a second of the game)
+        """
+        self.run_phase("create_new_target", self.create_new_target)
+        self.run_phase("move_object", self.move_object)
+        self.run_phase("ai_acts", self.ai_acts)
+        self.run_phase("bot_acts", self.bot_acts)
+        self.run_phase("check_hit", self.check_hit)
+        self.run_phase("remove_vehicle", self.remove_vehicle)
+        self.run_phase("process_particles", self.process_particles)
+        self.run_phase("check_tanks", self.check_tanks)
+        self.compact_lists()
+        self.ticks += 1
+        if self.recording is not None:
+            self.recording.ticks = self.ticks
+
+    def step(self):
+        """
+        Processing one tick of the game together with input and drawing
+        """
+        self.run_phase("process_input", self.process_input)
+        if not self.finished:
+            self.simulate()
+        if self.draw and not self.finished:
+            self.run_phase("draw_objects", self.draw_objects)
+        self.end_frame()
+        if not self.headless:
+            self.run_phase("display_update", self.display_update)
+
+    def run(self, max_ticks=None):
+        """
+        Processing ticks until the game is finished: in headless mode ticks are processed as fast as possible,
+        otherwise simulation runs with TICK_RATE ticks per second (up to MAX_CATCH_UP_TICKS ticks per frame)
+        independently of the frame rate
+        :param max_ticks: int - maximum number of ticks to process, unlimited if not given
+        """
+        if self.headless:
+            while not self.finished and (max_ticks is None or self.ticks < max_ticks):
+                self.step()
+            return
+
+        tick_duration = 1 / TICK_RATE
+        accumulator = 0
+        previous_time = time.perf_counter()
+        while not self.finished and (max_ticks is None or self.ticks < max_ticks):
+            current_time = time.perf_counter()
+            accumulator += current_time - previous_time
+            previous_time = current_time
+
+            self.run_phase("process_input", self.process_input)
+            caught_up_ticks = 0
+            while (accumulator >= tick_duration and caught_up_ticks < MAX_CATCH_UP_TICKS and not self.finished and
+                   (max_ticks is None or self.ticks < max_ticks)):
+                self.simulate()
+                accumulator -= tick_duration
+                caught_up_ticks += 1
+            if caught_up_ticks == MAX_CATCH_UP_TICKS:
+                accumulator = min(accumulator, tick_duration)
+
+            if self.draw and not self.finished:
+                self.run_phase("draw_objects", self.draw_objects, min(accumulator / tick_duration, 1))
+            self.end_frame()
+            self.run_phase("display_update", self.display_update)
+
+
+def parse_spawn_weights(parser, spawn_weights):
+    """
+    Request for the weights of target types from the command line
+    :param parser: ArgumentParser object - parser, that reports errors
+    :param spawn_weights: list[string] - "TYPE=WEIGHT" for every target type
+    :return: dict{string: float} - {name of target type: weight}
+    """
+    weights = {}
+    for weight in spawn_weights:
+        name, separator, value = weight.partition("=")
+        if not separator:
+            parser.error("spawn weight has to be TYPE=WEIGHT: {}".format(weight))
+        if name not in TARGET_TYPES:
+            parser.error("unknown target type: {}".format(name))
+        try:
+            weights[name] = float(value)
+        except ValueError:
+            parser.error("spawn weight is not a number: {}".format(weight))
+        if not weights[name] >= 0:
+            parser.error("spawn weight has to be non-negative: {}".format(weight))
+    if not sum(weights.values()) > 0:
+        parser.error("at least one spawn weight has to be positive")
+    return weights
+
+
+def main(args=None):
+    """
+    Running the game
+    :param args: list[string] - command line arguments, sys.argv if not given
+    """
+    parser = argparse.ArgumentParser(description="Simple artillery game")
+    parser.add_argument("--headless", action="store_true", help="simulate without a window and frame rate limit")
+    parser.add_argument("--no-draw", action="store_true", help="do not draw objects")
+    parser.add_argument("--dirty-rects", action="store_true", help="redraw and update only changed parts of screen")
+    parser.add_argument("--fps", type=int, default=FPS, help="frame rate limit (0 - unlimited)")
+    parser.add_argument("--aim-preview", action="store_true", help="draw the arc of the shot")
+    parser.add_argument("--bot", action="store_true", help="let a bot control the tank, that is not under control")
+    parser.add_argument("--profile", action="store_true", help="draw timings of game loop phases")
+    parser.add_argument("--trace", default=None, metavar="PATH", help="dump timings of every frame to .csv or .json")
+    parser.add_argument("--precise-collision", nargs="+", default=[], choices=list(VEHICLE_TYPES),
+                        metavar="TYPE", help="use pixel masks of textures for collision of these vehicle types")
+    parser.add_argument("--spawn-rate", type=float, default=1 / 5, help="targets spawned per second on average")
+    parser.add_argument("--max-targets", type=int, default=4, help="maximum number of targets at once")
+    parser.add_argument("--spawn-weights", nargs="+", default=["AirBalloon=4", "Airship=1"], metavar="TYPE=WEIGHT",
+                        help="weights of target types in spawns")
+    parser.add_argument("--seed", type=int, default=None, help="seed of random numbers")
+    parser.add_argument("--record", default=None, metavar="PATH", help="save player input to .json file on exit")
+    parser.add_argument("--replay", default=None, metavar="PATH",
+                        help="replay recorded input headlessly as fast as possible and print the result")
+    parser.add_argument("--ticks", type=int, default=None, help="stop after this number of ticks")
+    parser.add_argument("--size", type=int, nargs=2, default=None, metavar=("WIDTH", "HEIGHT"), help="screen size")
+    args = parser.parse_args(args)
+
+    replay = None
+    if args.replay is not None:
+        replay = InputRecording.load(args.replay)
+        args.headless = True
+        args.no_draw = True
+        args.size = replay.size
+        args.seed = replay.seed
+        for name, value in replay.settings.items():
+            setattr(args, name, value)
+        for name in InputRecording.SETTINGS:
+            if name not in replay.settings:
+                setattr(args, name, parser.get_default(name))
+
+    spawn_table = SpawnTable(args.spawn_rate, parse_spawn_weights(parser, args.spawn_weights), args.max_targets)
+
+    screen = init_display(args.headless, args.size)
+    if replay is None:
+        InputHandler.block_unused_events()
+    set_precise_collision(args.precise_collision)
+    profiler = None
+    if args.profile or args.trace is not None:
+        profiler = FrameProfiler(overlay=args.profile, record_trace=args.trace is not None)
+    if args.seed is None:
+        args.seed = rand.randrange(2 ** 32)
+    recording = None
+    if args.record is not None:
+        recording = InputRecording(args.seed, (SCREEN_WIDTH, SCREEN_HEIGHT),
+                                   settings={name: getattr(args, name) for name in InputRecording.SETTINGS})
+    game = Gameplay(screen, args.headless, not args.no_draw, args.dirty_rects, args.fps, profiler, args.seed,
+                    recording, replay, args.aim_preview, args.bot, spawn_table)
+    start = time.perf_counter()
+    try:
+        game.run(args.ticks)
+    finally:
+        if args.trace is not None:
+            profiler.dump(args.trace)
+        if args.record is not None:
+            recording.save(args.record)
+        pg.quit()
+    if replay is not None:
+        print("Replayed {} ticks in {:.2f} s, score: {}".format(game.ticks, time.perf_counter() - start,
+                                                                 game.score_list))
+
+
+if __name__ == "__main__":
+    main()
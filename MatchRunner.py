@@ -0,0 +1,220 @@
+import pygame as pg
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random as rand
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import GameItself as engine
+
+GUN_TYPES = {"Artillery": engine.Artillery, "Shotgun": engine.Shotgun}
+TICK_LIMIT = engine.TICK_RATE * 60 * 5
+
+
+class ScriptedInput:
+    """
+    Input of a simple player for headless matches, that is given to Gameplay instead of a recording: it aims at
+    a random target (or upwards), charges the gun and fires, and switches tanks from time to time. With aim assist
+    the angle and the fire power are taken from the trajectory table, so that the shot reaches the target
+    """
+
+    def __init__(self, seed, ticks, fire_period=120, switch_period=1200, aim_assist=True):
+        """
+        Initializing a ScriptedInput
+        :param seed: int - seed of random numbers of the player
+        :param ticks: int - length of the match in ticks
+        :param fire_period: int - number of ticks between shots
+        :param switch_period: int - number of ticks between switching of tanks (0 - never)
+        :param aim_assist: bool - are shots aimed by TRAJECTORIES (otherwise the cursor is put on the target and
+                           fire power is random)
+        """
+        self.rng = rand.Random(seed)
+        self.ticks = ticks
+        self.fire_period = fire_period
+        self.switch_period = switch_period
+        self.aim_assist = aim_assist
+        self.game = None
+        self.release_tick = None
+
+    def aim(self, target):
+        """
+        Request for the cursor position and the charge time of the shot at the target (a moving target is led by
+        the ticks of the charge and the flight)
+        :param target: Vehicle object - target
+        :return: tuple[int, int] - position of cursor
+        :return: int - number of ticks the mouse button is held
+        """
+        position = (int(target.coordinates[0]), int(target.coordinates[1]))
+        if not self.aim_assist:
+            return position, self.rng.randint(10, 40)
+        gun = self.game.guns_list[self.game.tank_under_control]
+        x = target.coordinates[0] - gun.coordinates[0]
+        y = target.coordinates[1] - gun.coordinates[1]
+        shot = engine.TRAJECTORIES.aim(x, y)
+        if shot is not None:
+            lead = engine.TRAJECTORIES.lead_ticks(shot)
+            shot = engine.TRAJECTORIES.aim(x + target.velocity[0] * lead, y + target.velocity[1] * lead)
+        if shot is None:
+            return position, self.rng.randint(10, 40)
+        bucket, power, _ = shot
+        return ((int(gun.coordinates[0] + 1000 * engine.COS_TABLE[bucket]),
+                 int(gun.coordinates[1] + 1000 * engine.SIN_TABLE[bucket])), power - 10)
+
+    def events_for(self, tick):
+        """
+        Request for the events of the player before the tick
+        :param tick: int - number of tick
+        :return: list[Pygame event object] - events
+        """
+        events = []
+        if self.switch_period and tick and tick % self.switch_period == 0:
+            events.append(pg.event.Event(pg.KEYDOWN, key=engine.KEY_BINDINGS["switch_tank"]))
+            events.append(pg.event.Event(pg.KEYUP, key=engine.KEY_BINDINGS["switch_tank"]))
+        if tick % self.fire_period == 0 and self.release_tick is None:
+            targets = list(self.game.targets_list)
+            if targets:
+                position, charge = self.aim(self.rng.choice(targets))
+            else:
+                position, charge = (self.rng.randint(0, engine.SCREEN_WIDTH), 0), self.rng.randint(10, 40)
+            events.append(pg.event.Event(pg.MOUSEMOTION, pos=position))
+            events.append(pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=position))
+            self.release_tick = tick + charge
+        if self.release_tick is not None and tick >= self.release_tick:
+            events.append(pg.event.Event(pg.MOUSEBUTTONUP, button=1, pos=(0, 0)))
+            self.release_tick = None
+        return events
+
+
+def init_worker(size):
+    """
+    Preparing the worker process (display and textures are loaded once for all its matches)
+    :param size: list[int, int] - [width of screen, height of screen]
+    """
+    engine.init_display(True, size)
+
+
+def run_match(config):
+    """
+    Playing one headless match without drawing as fast as possible
+    :param config: dict - {"seed": int, "weapons": [gun type of every tank], "spawn_rate": float, "ticks": int}
+    :return: dict - config together with the results of the match
+    """
+    start = time.perf_counter()
+    player = ScriptedInput(config["seed"], config["ticks"], aim_assist=config.get("aim_assist", True))
+    game = engine.Gameplay(pg.display.get_surface(), True, False, seed=config["seed"], replay=player,
+                           spawn_table=engine.SpawnTable(config["spawn_rate"]))
+    player.game = game
+    for index, tank in enumerate(game.tanks_list):
+        game.guns_list[index] = GUN_TYPES[config["weapons"][index]](game.surface, tank.coordinates)
+    game.run()
+    result = dict(config)
+    result.update({"score": game.score_list, "ticks_survived": game.ticks, "tanks_left": len(game.tanks_list),
+                   "shots_fired": game.shots_fired, "projectiles_fired": game.projectiles_fired, "hits": game.hits,
+                   "seconds": time.perf_counter() - start})
+    return result
+
+
+def match_configs(matches, ticks, seed, weapons, spawn_rates, aim_assist=True):
+    """
+    Request for the configs of matches: seeds go one by one, weapon mixes and spawn rates are cycled
+    :param matches: int - number of matches
+    :param ticks: int - length of every match in ticks
+    :param seed: int - seed of the first match
+    :param weapons: list[string] - gun types, every pair of them is a weapon mix
+    :param spawn_rates: list[float] - spawn rates of targets (targets per second)
+    :param aim_assist: bool - do players aim by the trajectory table
+    :return: list[dict] - configs of matches
+    """
+    mixes = itertools.cycle(itertools.product(itertools.product(weapons, repeat=2), spawn_rates))
+    return [{"seed": seed + index, "weapons": list(mix), "spawn_rate": spawn_rate, "ticks": ticks,
+             "aim_assist": aim_assist}
+            for index, (mix, spawn_rate) in zip(range(matches), mixes)]
+
+
+def run_matches(configs, workers=None, size=(1920, 1080)):
+    """
+    Playing matches in parallel processes and yielding results as soon as every match finishes
+    :param configs: list[dict] - configs of matches
+    :param workers: int - number of processes (number of cores if not given)
+    :param size: list[int, int] - [width of screen, height of screen]
+    :return: iterator[dict] - results of matches in the order of finishing
+    """
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=multiprocessing.get_context("spawn"),
+                             initializer=init_worker, initargs=(size,)) as executor:
+        futures = [executor.submit(run_match, config) for config in configs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def aggregate(results):
+    """
+    Summarizing results for every weapon mix and spawn rate
+    :param results: list[dict] - results of matches
+    :return: dict - {"weapon mix @ spawn rate": summary}
+    """
+    groups = {}
+    for result in results:
+        key = "{} vs {} @ {}".format(result["weapons"][0], result["weapons"][1], result["spawn_rate"])
+        groups.setdefault(key, []).append(result)
+    summary = {}
+    for key, group in sorted(groups.items()):
+        fired = sum(result["projectiles_fired"] for result in group)
+        summary[key] = {
+            "matches": len(group),
+            "mean_score": [sum(result["score"][index] for result in group) / len(group) for index in range(2)],
+            "mean_ticks_survived": sum(result["ticks_survived"] for result in group) / len(group),
+            "hits_per_projectile": sum(result["hits"] for result in group) / fired if fired else math.nan,
+        }
+    return summary
+
+
+def main(args=None):
+    """
+    Running a sweep of matches
+    :param args: list[string] - command line arguments, sys.argv if not given
+    """
+    parser = argparse.ArgumentParser(description="Parallel headless matches of SimpleArtGame")
+    parser.add_argument("--matches", type=int, default=16, help="number of matches")
+    parser.add_argument("--ticks", type=int, default=TICK_LIMIT, help="maximum length of every match in ticks")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first match")
+    parser.add_argument("--weapons", nargs="+", default=list(GUN_TYPES), choices=list(GUN_TYPES),
+                        help="gun types combined into weapon mixes")
+    parser.add_argument("--spawn-rates", type=float, nargs="+", default=[0.2], help="targets per second")
+    parser.add_argument("--no-aim-assist", action="store_true", help="aim at targets without trajectory table")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--size", type=int, nargs=2, default=[1920, 1080], metavar=("WIDTH", "HEIGHT"),
+                        help="screen size")
+    parser.add_argument("--output", default=None, metavar="PATH", help="write results of matches to .jsonl file")
+    args = parser.parse_args(args)
+
+    configs = match_configs(args.matches, args.ticks, args.seed, args.weapons, args.spawn_rates,
+                            not args.no_aim_assist)
+    output = open(args.output, "w") if args.output is not None else None
+    results = []
+    start = time.perf_counter()
+    try:
+        for result in run_matches(configs, args.workers, args.size):
+            results.append(result)
+            line = json.dumps(result)
+            print(line)
+            if output is not None:
+                output.write(line + "\n")
+                output.flush()
+    finally:
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - start
+    ticks = sum(result["ticks_survived"] for result in results)
+    print("{} matches, {} ticks in {:.1f} s ({:.0f} ticks/sec)".format(len(results), ticks, elapsed, ticks / elapsed),
+          file=sys.stderr)
+    for key, summary in aggregate(results).items():
+        print("{}: {}".format(key, summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import numpy as np
+import math
+from collections import OrderedDict
+
+
+class TrajectoryTable:
+    """
+    Discrete arcs of projectiles for every angle bucket and fire power, exactly as the engine moves them (velocity is
+    increased by gravitation, then position by velocity). After n ticks the Projectile fired from the chamber with
+    angle a and power p is at (reach[p, n] * cos(a), reach[p, n] * sin(a) + drop[n]), where
+    reach[p, n] = muzzle_length + n * p and drop[n] = gravitation * n * (n + 1) / 2, so the table of all arcs is
+    stored as these two small tables together with sin and cos of angle buckets
+    """
+
+    def __init__(self, gravitation, angle_buckets, muzzle_length=40, min_power=10, max_power=50, max_ticks=120,
+                 max_cached=4096):
+        """
+        Initializing a TrajectoryTable
+        :param gravitation: float - increase of the y velocity within a tick
+        :param angle_buckets: int - number of quantized angles in the full turn
+        :param muzzle_length: float - distance from the chamber to the point where projectiles appear
+        :param min_power: int - minimum fire power
+        :param max_power: int - maximum fire power
+        :param max_ticks: int - length of stored arcs in ticks (with the default powers any shot falls back below the
+                          chamber within 112 ticks, so nothing above it is reached later)
+        :param max_cached: int - maximum number of stored answers of aim
+        """
+        self.gravitation = gravitation
+        self.angle_buckets = angle_buckets
+        self.angle_step = 2 * math.pi / angle_buckets
+        self.muzzle_length = muzzle_length
+        self.min_power = min_power
+        self.max_power = max_power
+        self.max_ticks = max_ticks
+        self.max_cached = max_cached
+        self.sin = np.sin(np.arange(angle_buckets) * self.angle_step)
+        self.cos = np.cos(np.arange(angle_buckets) * self.angle_step)
+        self.powers = np.arange(min_power, max_power + 1)
+        self.ticks = np.arange(max_ticks + 1)
+        self.reach = muzzle_length + self.powers[:, None] * self.ticks[None, :].astype(float)
+        self.drop = gravitation * self.ticks * (self.ticks + 1) / 2
+        self.reach_squared = self.reach ** 2
+        self.cache = OrderedDict()
+
+    def arc(self, bucket, power, every=1):
+        """
+        Request for the positions of Projectile relative to the chamber during max_ticks ticks
+        :param bucket: int - angle bucket
+        :param power: int - fire power
+        :param every: int - step between returned ticks
+        :return: numpy array[float] - x offsets
+        :return: numpy array[float] - y offsets
+        """
+        reach = self.reach[power - self.min_power, ::every]
+        return reach * self.cos[bucket], reach * self.sin[bucket] + self.drop[::every]
+
+    def lead_ticks(self, shot):
+        """
+        Request for the number of ticks from the start of the charge until the shot reaches the point: the charge
+        grows by one fire power per tick from min_power, then the projectile flies
+        :param shot: tuple[int, int, float] - (angle bucket, fire power, ticks of flight) returned by aim
+        :return: float - number of ticks, that a moving point has to be led by
+        """
+        return shot[1] - self.min_power + shot[2]
+
+    def landing(self, bucket, power, ground_offset, rad=0):
+        """
+        Searching for the tick, when Projectile hits the ground (its top point goes below the ground line, so the
+        whole Projectile is under it, as the engine checks), by solving the quadratic equation of the drop
+        :param bucket: int - angle bucket
+        :param power: int - fire power
+        :param ground_offset: float - height of the chamber above the ground line
+        :param rad: float - radius of Projectile
+        :return: int - number of ticks since the shot
+        :return: float - x offset of the landing point relative to the chamber
+        """
+        sin = self.sin[bucket]
+        half_gravitation = self.gravitation / 2
+        linear = power * sin + half_gravitation
+        constant = self.muzzle_length * sin - ground_offset - rad
+        discriminant = max(linear ** 2 - 4 * half_gravitation * constant, 0)
+        root = (-linear + math.sqrt(discriminant)) / (2 * half_gravitation)
+        tick = max(0, math.floor(root))
+        while self.height(sin, power, tick) <= ground_offset + rad:
+            tick += 1
+        while tick > 0 and self.height(sin, power, tick - 1) > ground_offset + rad:
+            tick -= 1
+        return tick, (self.muzzle_length + tick * power) * self.cos[bucket]
+
+    def height(self, sin, power, tick):
+        """
+        Request for the y offset of Projectile relative to the chamber
+        :param sin: float - sine of the angle
+        :param power: int - fire power
+        :param tick: int - number of ticks since the shot
+        :return: float - y offset
+        """
+        return (self.muzzle_length + tick * power) * sin + self.gravitation * tick * (tick + 1) / 2
+
+    def aim(self, x, y, precision=2):
+        """
+        Searching for the shot, that reaches the point first: for every fire power the moment, when the arc
+        crosses the circle around the point (distance from the chamber grows as reach, the point drops as drop), is
+        found in the table, and the angle follows from it. Answers are cached for the point rounded to precision
+        :param x: float - x offset of the point relative to the chamber
+        :param y: float - y offset of the point relative to the chamber
+        :param precision: float - size of the grid of cached points
+        :return: tuple[int, int, float] - (angle bucket, fire power, ticks of flight), None if no shot reaches
+                 the point above the horizon within max_ticks
+        """
+        key = (round(x / precision), round(y / precision))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        x = key[0] * precision
+        y = key[1] * precision
+        rests = self.reach_squared - (x ** 2 + (y - self.drop) ** 2)
+        ticks = (rests >= 0).argmax(axis=1).tolist()
+        shot = None
+        # stronger shots cross the circle earlier and drop less, so the first allowed one from the strongest is the
+        # earliest
+        for row in range(len(ticks) - 1, -1, -1):
+            tick = ticks[row]
+            if tick == 0:
+                continue
+            before, after = rests[row, tick - 1:tick + 1].tolist()
+            if after < 0:
+                continue
+            moment = tick - 1 + before / (before - after)
+            angle = math.atan2(y - self.gravitation * moment * (moment + 1) / 2, x)
+            if angle <= 0:
+                shot = (round(angle / self.angle_step) % self.angle_buckets, int(self.powers[row]), moment)
+                break
+        self.cache[key] = shot
+        if len(self.cache) > self.max_cached:
+            self.cache.popitem(last=False)
+        return shot